@@ -1,6 +1,7 @@
 import os
 import shutil
 import socket
+import sqlite3
 import subprocess
 import sys
 import threading
@@ -64,15 +65,28 @@ def get_db_path():
         if not document_dir.exists():
             document_dir.mkdir(parents=True, exist_ok=True)
         if (get_resource_path("data.db")).exists():
-            # 复制一份到exe目录
-            with (
-                open(get_resource_path("data.db"), "rb") as src,
-                open(document_dir / "data.db", "wb") as dst,
-            ):
-                dst.write(src.read())
+            # 复制一份到文档目录
+            seed_db(get_resource_path("data.db"), document_dir / "data.db")
     return document_dir / "data.db"
 
 
+def seed_db(src: Path, dst: Path, pages: int = 1024):
+    """
+    用 SQLite 在线备份接口逐批复制数据库，内存占用与数据库大小无关
+
+    先写入临时文件再改名，复制中断时不会留下不完整的数据库
+    """
+    tmp = dst.with_name(dst.name + ".tmp")
+    source = sqlite3.connect(src)
+    target = sqlite3.connect(tmp)
+    try:
+        source.backup(target, pages=pages)
+    finally:
+        target.close()
+        source.close()
+    os.replace(tmp, dst)
+
+
 # 获取 UV Python 路径
 def get_uv_python():
     """获取虚拟环境中的 Python 解释器路径"""
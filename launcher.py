@@ -9,6 +9,9 @@ from environment import PORTS, get_resource_path, isProd
 
 # 全局变量存储服务器状态
 server_ready = False
+server = None
+# 关闭窗口后等待服务器退出（结束运行中的任务、保存任务状态）的最长时间
+SHUTDOWN_TIMEOUT = 15
 
 
 def dev_fastapi():
@@ -45,7 +48,7 @@ def main_fastapi():
 
     from for_ffmpeg.main import app as fastapi_app
 
-    global server_ready
+    global server_ready, server
     # 配置UVicorn
     config = uvicorn.Config(
         fastapi_app, host="127.0.0.1", port=PORTS["API"], log_level="debug"
@@ -86,6 +89,12 @@ def main():
     # 启动应用
     webview.start(window)
 
+    # 窗口关闭后通知服务器退出：服务器线程是守护线程，不等待的话进程直接结束，
+    # 不会执行 lifespan 的关闭流程，正在运行的 ffmpeg 子进程会遗留下来
+    if server is not None:
+        server.should_exit = True
+        server_thread.join(SHUTDOWN_TIMEOUT)
+
 
 if __name__ == "__main__":
     if isProd():
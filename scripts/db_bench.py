@@ -0,0 +1,141 @@
+"""
+文件说明：
+对比数据库性能配置（db.DB_PROFILES）下的读写吞吐：
+逐条事务写入执行历史、批量写入文件索引，以及写入同时的并发读取。
+
+用法：python scripts/db_bench.py [--jobs 2000] [--files 20000] [--readers 4]
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path[:0] = [
+    str(Path(__file__).parent.parent),
+    str(Path(__file__).parent.parent / "server" / "src"),
+]
+
+from sqlalchemy import func, select  # noqa: E402
+from sqlalchemy.dialects.sqlite import insert  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from for_ffmpeg.api.models import FileIndex, JobHistory  # noqa: E402
+from for_ffmpeg.db import DB_PROFILES, Base, make_engine  # noqa: E402
+
+BATCH_SIZE = 500
+
+
+def _history(i: int) -> dict:
+    return {
+        "id": f"bench-{i}",
+        "kind": "convert",
+        "preset": f"P{i % 10}",
+        "state": "done",
+        "finished_at": time.time(),
+        "wall_time": 1.0,
+    }
+
+
+async def write_jobs(Session, start: int, count: int) -> float:
+    """每个任务一个事务（与任务结束时写入执行历史相同）"""
+    begin = time.perf_counter()
+    for i in range(start, start + count):
+        async with Session() as session:
+            await session.execute(insert(JobHistory).values(_history(i)))
+            await session.commit()
+    return time.perf_counter() - begin
+
+
+async def write_files(Session, count: int) -> float:
+    """按批 upsert 文件索引（与扫描目录时相同）"""
+    begin = time.perf_counter()
+    for start in range(0, count, BATCH_SIZE):
+        rows = [
+            {
+                "path": f"/media/{i // 100}/{i}.flac",
+                "parent": f"/media/{i // 100}",
+                "is_dir": False,
+                "size": i,
+                "mtime": 1.0,
+                "ext": "flac",
+                "changed_at": time.time(),
+            }
+            for i in range(start, min(start + BATCH_SIZE, count))
+        ]
+        stmt = insert(FileIndex).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[FileIndex.path],
+            set_={"size": stmt.excluded.size, "changed_at": stmt.excluded.changed_at},
+        )
+        async with Session() as session:
+            await session.execute(stmt)
+            await session.commit()
+    return time.perf_counter() - begin
+
+
+async def read_loop(Session, stop: asyncio.Event) -> int:
+    """统计查询 + 按目录查询文件索引，直至写入结束"""
+    reads = 0
+    while not stop.is_set():
+        async with Session() as session:
+            await session.execute(
+                select(JobHistory.preset, func.count(), func.avg(JobHistory.wall_time))
+                .where(JobHistory.state == "done")
+                .group_by(JobHistory.preset)
+            )
+            await session.execute(
+                select(FileIndex).where(FileIndex.parent == f"/media/{reads % 100}")
+            )
+        reads += 1
+    return reads
+
+
+async def bench(profile: str, folder: str, args) -> dict:
+    engine = make_engine(
+        f"sqlite+aiosqlite:///{folder}/{profile}.db", profile=profile, echo=False
+    )
+    Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    result = {}
+    elapsed = await write_jobs(Session, 0, args.jobs)
+    result["job_writes/s"] = args.jobs / elapsed
+    elapsed = await write_files(Session, args.files)
+    result["file_rows/s"] = args.files / elapsed
+
+    # 写入的同时并发读取
+    stop = asyncio.Event()
+    readers = [
+        asyncio.create_task(read_loop(Session, stop)) for _ in range(args.readers)
+    ]
+    elapsed = await write_jobs(Session, args.jobs, args.jobs)
+    stop.set()
+    reads = sum(await asyncio.gather(*readers))
+    result["mixed_writes/s"] = args.jobs / elapsed
+    result["mixed_reads/s"] = reads / elapsed
+    await engine.dispose()
+    return result
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="数据库性能配置对比")
+    parser.add_argument("--jobs", type=int, default=2000, help="逐条写入的任务数")
+    parser.add_argument("--files", type=int, default=20000, help="批量写入的文件数")
+    parser.add_argument("--readers", type=int, default=4, help="并发读取的协程数")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as folder:
+        results = {p: await bench(p, folder, args) for p in DB_PROFILES}
+    metrics = list(next(iter(results.values())))
+    print(f"{'':16}" + "".join(f"{p:>12}" for p in results) + f"{'fast/safe':>10}")
+    for metric in metrics:
+        values = [results[p][metric] for p in results]
+        gain = results["fast"][metric] / (results["safe"][metric] or 1)
+        print(f"{metric:16}" + "".join(f"{v:12.0f}" for v in values) + f"{gain:9.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,4 +1,6 @@
 from .conf import router as conf_router
 from .ffmpeg import router as ffmpeg_router
+from .jobs import router as jobs_router
+from .watch import router as watch_router
 
-routers = [conf_router, ffmpeg_router]
+routers = [conf_router, ffmpeg_router, jobs_router, watch_router]
@@ -1,20 +1,30 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy import delete, select
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from for_ffmpeg.api.models import ConfParam, ConfParamDto
-from for_ffmpeg.db import get_db, wrap_response
+from for_ffmpeg.cache import command_cache, conf_cache, conf_dict
+from for_ffmpeg.db import (
+    get_db,
+    not_modified,
+    sync_rows,
+    wrap_etag_response,
+    wrap_response,
+)
 
 # 创建 API 路由
 router = APIRouter()
 
 
-async def select_conf_param(key: str, session: AsyncSession = Depends(get_db)):
-    """选择配置参数"""
-    result = await session.execute(select(ConfParam).where(ConfParam.pkey == key))
-    param = result.scalars().first()
-    return param.pvalue if param else None
+async def select_conf_param(key: str):
+    """选择配置参数（读取缓存）"""
+    param = conf_cache.get(key)
+    return param["pvalue"] if param else None
+
+
+async def load_conf_dict() -> dict:
+    """读取全部配置参数为字典（读取缓存）"""
+    return conf_dict()
 
 
 @router.post("/save-conf-param")
@@ -22,35 +32,43 @@ async def save_conf_param(
     conf: List[ConfParamDto], session: AsyncSession = Depends(get_db)
 ) -> dict:
     """
-    插入或更新配置参数
+    插入或更新配置参数（整体保存，只写入差异），返回新增/更新/删除的行数
     """
     try:
-        # 清空表
-        await session.execute(delete(ConfParam))
-        # 插入新数据
-        orm_commands = [ConfParam(**cmd.model_dump()) for cmd in conf]
-        session.add_all(orm_commands)
-        await session.commit()
+        changes = await sync_rows(session, ConfParam, [p.model_dump() for p in conf])
         await session.commit()
-        return wrap_response(message="配置参数已保存")
+        if any(changes.values()):
+            await conf_cache.load()
+        return wrap_response(data=changes, message="配置参数已保存")
     except Exception as e:
         await session.rollback()
         return wrap_response(message=f"配置参数保存失败: {str(e)}", status=2)
 
 
 @router.get("/get-conf-param")
-async def get_conf_param(session: AsyncSession = Depends(get_db)) -> dict:
+async def get_conf_param(request: Request):
+    """获取配置参数，支持 If-None-Match（未变化时返回 304）"""
+    etag = conf_cache.etag
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
     try:
-        result = await session.execute(select(ConfParam))
-        commands = result.scalars().all()
         command_list = [
             {
-                "pkey": cmd.pkey,
-                "pvalue": cmd.pvalue,
+                "pkey": cmd["pkey"],
+                "pvalue": cmd["pvalue"],
             }
-            for cmd in commands
+            for cmd in conf_cache.values()
         ]
-        return wrap_response(data=command_list)
+        return wrap_etag_response(etag, data=command_list)
     except Exception as e:
         print(f"获取配置参数失败: {e}")
         return wrap_response(message=f"获取配置参数失败: {str(e)}", status=2)
+
+
+@router.get("/get-cache-version")
+async def get_cache_version() -> dict:
+    """配置参数与 ffmpeg 命令缓存的版本号，保存后递增"""
+    return wrap_response(
+        data={"conf": conf_cache.version, "commands": command_cache.version}
+    )
@@ -1,17 +1,62 @@
-import codecs
+import asyncio
 import os
 import re
-import subprocess
+import uuid
 from tkinter import Tk, filedialog
-from typing import List
+from typing import Dict, List
 
-from fastapi import APIRouter, BackgroundTasks, Depends
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from for_ffmpeg.api.models import FfmpegCanmand, FfmpegCanmandDto
-from for_ffmpeg.db import get_db, wrap_response
+from for_ffmpeg.batch import (
+    PatternError,
+    conversion_jobs,
+    expand_folder,
+    iter_plan,
+    make_output_dirs,
+    output_name,
+    plan_conflicts,
+)
+from for_ffmpeg.bench import list_benchmarks, submit_benchmark
+from for_ffmpeg.cache import command_cache, preset_command
+from for_ffmpeg.db import (
+    get_db,
+    not_modified,
+    sync_rows,
+    wrap_etag_response,
+    wrap_response,
+)
+from for_ffmpeg.engine import (
+    TemplateError,
+    build_argv,
+    build_multi_output_argv,
+    compile_template,
+    format_argv,
+)
+from for_ffmpeg.file_index import query_index, refresh_index
+from for_ffmpeg.incremental import split_up_to_date
+from for_ffmpeg.merge import (
+    COPY_CONCAT_TEMPLATE,
+    MERGE_GROUP_SIZE,
+    analyze_concat,
+    merge_job,
+    new_filelist,
+    submit_tree_merge,
+)
+from for_ffmpeg.probe import probe_files
+from for_ffmpeg.resources import estimate_outputs
+from for_ffmpeg.scanner import iter_ndjson, scan_page
+from for_ffmpeg.scheduler import (
+    Job,
+    Priority,
+    SchedulerFullError,
+    scheduler,
+    temp_output,
+)
+from for_ffmpeg.segment import submit_segmented
 
 # 创建 API 路由
 router = APIRouter()
@@ -45,29 +90,89 @@ async def select_folder():
     return wrap_response(data={"folder_path": folder_path})
 
 
+async def _scan(
+    path: str, recursive: bool, cursor: str | None, limit: int | None, detail: bool
+):
+    """在线程中扫描，避免阻塞事件循环；传入 limit 时分页返回"""
+    if not os.path.isdir(path):
+        return wrap_response(message="路径不存在或不是文件夹", status=2)
+    try:
+        page = await asyncio.to_thread(scan_page, path, recursive, cursor, limit)
+    except ValueError as e:
+        return wrap_response(message=str(e), status=2)
+    data = {"files": [e["path"] for e in page["entries"]]}
+    if detail or limit is not None:
+        data["entries"] = page["entries"]
+        data["next_cursor"] = page["next_cursor"]
+    return wrap_response(data=data)
+
+
 @router.get("/scan-files-for-walk")
-async def scan_files(path):
-    """扫描文件夹中的文件（递归）"""
+async def scan_files_for_walk(
+    path,
+    cursor: str | None = None,
+    limit: int | None = None,
+    detail: bool = False,
+    index: bool = False,
+    refresh: bool = True,
+    session: AsyncSession = Depends(get_db),
+):
+    """扫描文件夹中的文件（递归），index=true 时使用持久化索引增量扫描"""
+    if not index:
+        return await _scan(path, True, cursor, limit, detail)
     if not os.path.isdir(path):
         return wrap_response(message="路径不存在或不是文件夹", status=2)
-    files = []
-    for root, _, filenames in os.walk(path):
-        for filename in filenames:
-            files.append(os.path.join(root, filename))
-    return wrap_response(data={"files": files})
+    data = {}
+    if refresh:
+        data = await refresh_index(session, path)
+    entries = await query_index(session, path)
+    data["files"] = [e["path"] for e in entries]
+    if detail:
+        data["entries"] = entries
+    return wrap_response(data=data)
+
+
+@router.get("/file-index/changes")
+async def file_index_changes(
+    path, since: float, session: AsyncSession = Depends(get_db)
+):
+    """查询索引中自 since（时间戳）以来新增或变化的文件"""
+    entries = await query_index(session, path, since)
+    return wrap_response(data={"entries": entries})
 
 
 @router.get("/scan-files")
-async def scan_files(path):
+async def scan_files(
+    path, cursor: str | None = None, limit: int | None = None, detail: bool = False
+):
     """扫描当前文件夹中的文件（不递归）"""
+    return await _scan(path, False, cursor, limit, detail)
+
+
+@router.get("/scan-files-stream")
+async def scan_files_stream(path, recursive: bool = True):
+    """以 NDJSON 流式返回扫描结果（每行：path/size/mtime）"""
     if not os.path.isdir(path):
         return wrap_response(message="路径不存在或不是文件夹", status=2)
-    files = []
-    for filename in os.listdir(path):
-        full_path = os.path.join(path, filename)
-        if os.path.isfile(full_path):
-            files.append(full_path.replace("\\", "/"))
-    return wrap_response(data={"files": files})
+    # 同步生成器由 Starlette 放到线程池中迭代，不阻塞事件循环
+    return StreamingResponse(
+        iter_ndjson(path, recursive), media_type="application/x-ndjson"
+    )
+
+
+class ProbeFilesDto(BaseModel):
+    files: List[str]
+
+
+@router.post("/probe-files")
+async def probe_media_files(
+    req: ProbeFilesDto, session: AsyncSession = Depends(get_db)
+):
+    """批量获取媒体信息（时长、编码、分辨率、采样率、码率），结果按文件缓存"""
+    if not req.files:
+        return wrap_response(message="文件列表不能为空", status=2)
+    results = await probe_files(session, req.files)
+    return wrap_response(data={"results": results})
 
 
 class MergeFilesDto(BaseModel):
@@ -75,57 +180,102 @@ class MergeFilesDto(BaseModel):
     folderPath: str
     fileName: str
     cmd: str
+    # 流复制拼接：None 自动判断，True 强制 -c copy，False 始终使用所选指令
+    streamCopy: bool | None = None
+    # 合并通常很快，默认走高优先级通道，不必排在大批量转码之后
+    priority: Priority = "high"
+
+
+@router.post("/analyze-merge")
+async def analyze_merge(req: MergeFilesDto, session: AsyncSession = Depends(get_db)):
+    """合并前分析：探测输入文件，判断能否直接流复制拼接"""
+    if not req.files:
+        return wrap_response(message="文件列表不能为空", status=2)
+    infos = await probe_files(session, req.files)
+    return wrap_response(data=analyze_concat(req.files, infos, req.fileName))
 
 
-# 根据文件列表生成ffmpeg合并文件filelist.txt，并调用ffmpeg进行合并（需检查ffmpeg是否安装）
+# 根据文件列表生成ffmpeg合并文件filelist，并调用ffmpeg进行合并（需检查ffmpeg是否安装）
 @router.post("/create-filelist-merge")
-async def create_filelist_merge(req: MergeFilesDto, background_tasks: BackgroundTasks):
-    """创建ffmpeg合并文件filelist.txt，并后台执行合并任务"""
+async def create_filelist_merge(
+    req: MergeFilesDto, session: AsyncSession = Depends(get_db)
+):
+    """生成ffmpeg合并文件filelist，并提交合并任务到调度器"""
     if not req.files:
         return wrap_response(message="文件列表不能为空", status=2)
     if re.match(r".+\..+", req.fileName) is None:
         return wrap_response(message="文件名称异常", status=2)
-    filelist_path = os.path.join(req.folderPath, "filelist.txt").replace("\\", "/")
     output_path = os.path.join(req.folderPath, req.fileName).replace("\\", "/")
-    # 添加后台任务执行合并
-    background_tasks.add_task(merge_files_task, req, filelist_path, output_path)
-    return wrap_response(message="合并任务已提交，待执行完成后通知结果")
-
-
-def merge_files_task(req: MergeFilesDto, filelist_path: str, output_path: str):
-    """后台任务：生成 filelist 文件并执行 ffmpeg 合并命令"""
-
+    analysis = {"copy": req.streamCopy, "reason": None}
+    if req.streamCopy is None:
+        infos = await probe_files(session, req.files)
+        analysis = analyze_concat(req.files, infos, output_path)
+    # 各输入流参数一致时直接 -c copy 拼接，避免不必要的重新编码
+    template = COPY_CONCAT_TEMPLATE if analysis["copy"] else req.cmd
     try:
-        # 生成 filelist 文件，确保路径格式为正斜杠
-        with codecs.open(filelist_path, "w", encoding="utf-8") as f:
-            for path in req.files:
-                adjusted_path = path.replace("\\", "/")
-                f.write(f"file '{adjusted_path}'\n")
-        # 替换模板中的占位符
-        command = req.cmd.replace("FILE_LIST_TEXT", filelist_path).replace(
-            "OUT_PUT", output_path
+        compile_template(template)
+    except TemplateError as e:
+        return wrap_response(message=str(e), status=2)
+    if analysis["reason"]:
+        print(f"无法流复制拼接：{analysis['reason']}")
+    estimates, reason = await _estimate_space(
+        [(f, output_path) for f in req.files], template
+    )
+    if reason:
+        return wrap_response(message=reason, status=2)
+    if len(req.files) > MERGE_GROUP_SIZE:
+        # 文件很多时分组并行合并为中间文件，再合并中间文件
+        job = submit_tree_merge(req.files, output_path, template, priority=req.priority)
+    else:
+        # 每个任务使用独立的临时 filelist 与临时输出，同一目录下的合并可以并行
+        job_id = uuid.uuid4().hex
+        filelist_path = new_filelist()
+        target = temp_output(output_path, job_id)
+        # 模板解析为参数列表后替换占位符
+        argv = build_argv(
+            template, {"FILE_LIST_TEXT": filelist_path, "OUT_PUT": target}
         )
-        print(f"准备合并，指令：{command}，输出文件：{output_path}")
-        # 包装命令，使其在新的cmd窗口中运行，并在执行完成后关闭
-        execute_conversion_task(command)
-    except Exception as e:
-        print(f"生成指令失败: {e}")
+        print(f"准备合并，指令：{format_argv(argv)}，输出文件：{output_path}")
+        job = merge_job(
+            argv,
+            output_path,
+            req.files,
+            filelist_path,
+            job_id=job_id,
+            priority=req.priority,
+            temp_output=target,
+            template=template,
+            estimated_size=estimates.get(output_path, 0),
+        )
+        try:
+            scheduler.submit(job)
+        except SchedulerFullError as e:
+            os.remove(filelist_path)
+            return wrap_response(message=str(e), status=2)
+    return wrap_response(
+        data={
+            "job_ids": [job.id],
+            "stream_copy": bool(analysis["copy"]),
+            "reason": analysis["reason"],
+        },
+        message="合并任务已提交，待执行完成后通知结果",
+    )
 
 
-# 保存ffmpeg命令,整体保存，替换FfmpegCanmand表中数据
+# 保存ffmpeg命令,整体保存，只写入与FfmpegCanmand表中数据的差异
 @router.post("/save-ffmpeg-commands")
 async def save_ffmpeg_commands(
     commands: List[FfmpegCanmandDto], session: AsyncSession = Depends(get_db)
 ) -> dict:
-    """保存ffmpeg命令"""
+    """保存ffmpeg命令，返回新增/更新/删除的行数"""
     try:
-        # 清空表
-        await session.execute(delete(FfmpegCanmand))
-        # 插入新数据
-        orm_commands = [FfmpegCanmand(**cmd.model_dump()) for cmd in commands]
-        session.add_all(orm_commands)
+        changes = await sync_rows(
+            session, FfmpegCanmand, [cmd.model_dump() for cmd in commands]
+        )
         await session.commit()
-        return wrap_response(message="ffmpeg命令已保存")
+        if any(changes.values()):
+            await command_cache.load()
+        return wrap_response(data=changes, message="ffmpeg命令已保存")
     except Exception as e:
         await session.rollback()
         return wrap_response(message=f"ffmpeg命令保存失败: {str(e)}", status=2)
@@ -133,20 +283,22 @@ async def save_ffmpeg_commands(
 
 # 获取ffmpeg命令,整体获取，返回FfmpegCanmand表中数据
 @router.get("/get-ffmpeg-commands")
-async def get_ffmpeg_commands(session: AsyncSession = Depends(get_db)) -> dict:
-    """获取ffmpeg命令"""
+async def get_ffmpeg_commands(request: Request):
+    """获取ffmpeg命令（读取缓存），支持 If-None-Match（未变化时返回 304）"""
+    etag = command_cache.etag
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
     try:
-        result = await session.execute(select(FfmpegCanmand))
-        commands = result.scalars().all()
         command_list = [
             {
-                "name": cmd.name,
-                "command": cmd.command,
-                "description": cmd.description,
+                "name": cmd["name"],
+                "command": cmd["command"],
+                "description": cmd["description"],
             }
-            for cmd in commands
+            for cmd in command_cache.values()
         ]
-        return wrap_response(data=command_list)
+        return wrap_etag_response(etag, data=command_list)
     except Exception as e:
         print(f"获取ffmpeg命令失败: {e}")
         return wrap_response(message=f"获取ffmpeg命令失败: {str(e)}", status=2)
@@ -157,39 +309,280 @@ class SongDto(BaseModel):
     id: str
 
 
-class ConvertMediaDto(BaseModel):
+class ConvertOptionsDto(BaseModel):
+    cmd: str
+    # 大于 1 时按关键帧切成若干段并行转码后再无损拼接（适合单个长文件）
+    segments: int = 0
+    # 增量模式：跳过已是最新的输出
+    incremental: bool = False
+    priority: Priority = "normal"
+
+
+class ConvertMediaDto(ConvertOptionsDto):
     convFiles: List[SongDto]
     output_path: str
-    cmd: str
 
 
 @router.post("/convert-media")
-async def convert_media(req: ConvertMediaDto, background_tasks: BackgroundTasks):
-    """后台执行媒体文件转换任务"""
+async def convert_media(req: ConvertMediaDto):
+    """提交媒体文件转换任务到调度器"""
     if not req.convFiles:
         return wrap_response(message="转换文件列表不能为空", status=2)
-    for _file in req.convFiles:
-        inf = _file.id.replace("\\", "/")
-        ouf = _file.conv.replace("\\", "/")
-        command = req.cmd.replace("IN_PUT", inf).replace("OUT_PUT", ouf)
-        print(f"准备转换，指令：[{command}]，输出文件：{ouf}")
-        # 等待后台任务执行转换完成后继续下一个文件
-        background_tasks.add_task(execute_conversion_task, command)
-    return wrap_response(message="转换任务已提交，待执行完成后通知结果")
+    pairs = [
+        (_file.id.replace("\\", "/"), _file.conv.replace("\\", "/"))
+        for _file in req.convFiles
+    ]
+    return await _submit_conversions(pairs, req)
+
+
+class ConvertFolderDto(ConvertOptionsDto):
+    folder: str
+    recursive: bool = True
+    # 输出目录，为空时输出到输入文件所在目录（子目录结构保持不变）
+    output_path: str | None = None
+    # 输出文件名格式，支持 {name} {stem} {ext}，如 "{stem}.m4a"
+    output_pattern: str
+    # 过滤条件：扩展名、文件大小范围（字节）、文件名通配符
+    exts: List[str] = []
+    min_size: int | None = None
+    max_size: int | None = None
+    glob: str | None = None
 
 
-def execute_conversion_task(command: str):
-    """后台任务：执行媒体文件转换命令"""
+@router.post("/convert-folder")
+async def convert_folder(req: ConvertFolderDto):
+    """按目录与过滤条件在服务端展开转换任务，请求体大小与文件数量无关"""
     try:
-        # 包装命令，使其在新的cmd窗口中运行，并在执行完成后关闭
-        final_command = f'start cmd /c "{command}"'
-        subprocess_result = subprocess.Popen(
-            final_command,
-            shell=True,
-            creationflags=subprocess.CREATE_NEW_CONSOLE,
-            text=True,
-            encoding="utf-8",
+        output_name(req.output_pattern, "sample.ext")
+    except PatternError as e:
+        return wrap_response(message=str(e), status=2)
+    pairs = await asyncio.to_thread(lambda: list(_expand_folder(req)))
+    if not pairs:
+        return wrap_response(message="没有符合条件的文件", status=0)
+    # 输出覆盖输入（如未指定输出目录且文件名格式为 {name}）或输出重复时整批拒绝
+    conflicts = plan_conflicts(pairs)
+    if conflicts:
+        return wrap_response(
+            data={"conflicts": conflicts[:20]},
+            message=f"{len(conflicts)} 个输出冲突，如：{conflicts[0]}",
+            status=2,
         )
-        print(f"转换完成: {subprocess_result.stdout}")
-    except subprocess.CalledProcessError as e:
-        print(f"转换失败: {e}, stderr: {e.stderr}")
+    await asyncio.to_thread(make_output_dirs, [ouf for _, ouf in pairs])
+    return await _submit_conversions(pairs, req)
+
+
+def _expand_folder(req: ConvertFolderDto):
+    return expand_folder(
+        req.folder,
+        req.output_pattern,
+        req.output_path,
+        req.recursive,
+        req.exts,
+        req.min_size,
+        req.max_size,
+        req.glob,
+    )
+
+
+class PlanConvertDto(ConvertFolderDto):
+    # 二选一：文件列表（同 /convert-media），或按目录展开（同 /convert-folder）
+    convFiles: List[SongDto] | None = None
+    folder: str | None = None
+    output_pattern: str | None = None
+
+
+@router.post("/plan-conversion")
+async def plan_conversion(req: PlanConvertDto):
+    """预演转换批次（不执行任何转换），以 NDJSON 流式返回展开的指令、跳过的文件与冲突"""
+    try:
+        compile_template(req.cmd)
+    except TemplateError as e:
+        return wrap_response(message=str(e), status=2)
+    if req.convFiles is not None:
+        pairs = iter(
+            [
+                (_file.id.replace("\\", "/"), _file.conv.replace("\\", "/"))
+                for _file in req.convFiles
+            ]
+        )
+    elif req.folder and req.output_pattern:
+        try:
+            output_name(req.output_pattern, "sample.ext")
+        except PatternError as e:
+            return wrap_response(message=str(e), status=2)
+        pairs = _expand_folder(req)
+    else:
+        return wrap_response(
+            message="需要提供 convFiles，或 folder 与 output_pattern", status=2
+        )
+    return StreamingResponse(
+        iter_plan(pairs, req.cmd, req.incremental), media_type="application/x-ndjson"
+    )
+
+
+async def _estimate_space(pairs: List[tuple], template: str | None = None):
+    """估算输出大小，磁盘剩余空间不足时返回原因（未启用资源限流时不检查）"""
+    if scheduler.governor is None:
+        return {}, None
+    estimates = await estimate_outputs(pairs, template)
+    return estimates, await scheduler.governor.check_space(estimates)
+
+
+async def _submit_conversions(pairs: List[tuple], req: ConvertOptionsDto):
+    """按 (输入, 输出) 列表创建转换任务并整批提交"""
+    try:
+        compile_template(req.cmd)
+    except TemplateError as e:
+        return wrap_response(message=str(e), status=2)
+    # 本次提交的任务共用一个批次号，可整批取消/暂停/恢复
+    batch = uuid.uuid4().hex
+    skipped = []
+    if req.incremental:
+        todo, skipped = await split_up_to_date(pairs, req.cmd)
+    else:
+        todo = [(inf, ouf, None) for inf, ouf in pairs]
+    if req.segments > 1:
+        _, reason = await _estimate_space([(inf, ouf) for inf, ouf, _ in todo], req.cmd)
+        if reason:
+            return wrap_response(message=reason, status=2)
+        jobs = [
+            submit_segmented(
+                inf,
+                ouf,
+                req.cmd,
+                req.segments,
+                priority=req.priority,
+                batch=batch,
+                stamp=stamp,
+            )
+            for inf, ouf, stamp in todo
+        ]
+        return wrap_response(
+            data={
+                "job_ids": [job.id for job in jobs],
+                "batch_id": batch,
+                "skipped": skipped,
+            },
+            message=f"分段转码任务已提交，跳过 {len(skipped)} 个已是最新的文件",
+        )
+    estimates, reason = await _estimate_space(
+        [(inf, ouf) for inf, ouf, _ in todo], req.cmd
+    )
+    if reason:
+        return wrap_response(message=reason, status=2)
+    jobs = conversion_jobs(todo, req.cmd, estimates, req.priority, batch)
+    try:
+        # 队列容量不足时整体拒绝，避免批次只提交一部分
+        scheduler.submit_many(jobs)
+    except SchedulerFullError as e:
+        return wrap_response(message=str(e), status=2)
+    return wrap_response(
+        data={
+            "job_ids": [job.id for job in jobs],
+            "batch_id": batch,
+            "skipped": skipped,
+        },
+        message=f"转换任务已提交，跳过 {len(skipped)} 个已是最新的文件",
+    )
+
+
+class MultiOutputFileDto(BaseModel):
+    id: str
+    # 各预设对应的输出文件，顺序与 presets 一致
+    convs: List[str]
+
+
+class ConvertMultiOutputDto(BaseModel):
+    convFiles: List[MultiOutputFileDto]
+    # 已保存的ffmpeg命令名称
+    presets: List[str]
+    priority: Priority = "normal"
+
+
+@router.post("/convert-media-multi")
+async def convert_media_multi(req: ConvertMultiOutputDto):
+    """一个输入同时转换为多个预设：合并为一次 ffmpeg 调用，只解码一次"""
+    if not req.convFiles or not req.presets:
+        return wrap_response(message="转换文件列表与预设不能为空", status=2)
+    commands = {name: preset_command(name) for name in req.presets}
+    missing = [name for name in req.presets if not commands.get(name)]
+    if missing:
+        return wrap_response(message=f"预设不存在：{missing}", status=2)
+    templates = [commands[name] for name in req.presets]
+    estimates = {}
+    if scheduler.governor:
+        # 各预设的码率不同，分别估算后合并检查
+        for i, template in enumerate(templates):
+            pairs = [
+                (_file.id.replace("\\", "/"), _file.convs[i].replace("\\", "/"))
+                for _file in req.convFiles
+                if i < len(_file.convs)
+            ]
+            estimates.update(await estimate_outputs(pairs, template))
+        reason = await scheduler.governor.check_space(estimates)
+        if reason:
+            return wrap_response(message=reason, status=2)
+    batch = uuid.uuid4().hex
+    jobs = []
+    for _file in req.convFiles:
+        inf = _file.id.replace("\\", "/")
+        outputs = [conv.replace("\\", "/") for conv in _file.convs]
+        job_id = uuid.uuid4().hex
+        # 各输出先写临时文件，成功后再原子替换
+        temps = [temp_output(output, job_id) for output in outputs]
+        try:
+            argv = build_multi_output_argv(templates, inf, temps)
+        except TemplateError as e:
+            return wrap_response(message=f"{inf}: {e}", status=2)
+        print(f"准备转换，指令：[{format_argv(argv)}]，输出文件：{outputs}")
+        jobs.append(
+            Job(
+                argv,
+                kind="convert",
+                output=outputs[0],
+                payload={
+                    "input": inf,
+                    "outputs": outputs,
+                    "temp_outputs": temps,
+                    "presets": req.presets,
+                    "estimated_size": sum(estimates.get(o, 0) for o in outputs),
+                },
+                job_id=job_id,
+                priority=req.priority,
+                batch=batch,
+            )
+        )
+    try:
+        scheduler.submit_many(jobs)
+    except SchedulerFullError as e:
+        return wrap_response(message=str(e), status=2)
+    return wrap_response(
+        data={"job_ids": [job.id for job in jobs], "batch_id": batch},
+        message="转换任务已提交，待执行完成后通知结果",
+    )
+
+
+class BenchmarkDto(BaseModel):
+    # 预设名称，为空时测试全部已保存的转换指令
+    presets: List[str] | None = None
+    # 样本时长（秒）
+    seconds: int = 10
+    # 各预设的输出扩展名，未指定时使用 mkv
+    exts: Dict[str, str] = {}
+
+
+@router.post("/benchmark-presets")
+async def benchmark_presets(req: BenchmarkDto):
+    """以生成的样本逐个测试预设的 fps、速度、CPU 时间与输出大小"""
+    if req.seconds <= 0:
+        return wrap_response(message="样本时长必须大于 0", status=2)
+    job = submit_benchmark(req.presets, req.seconds, req.exts)
+    return wrap_response(
+        data={"job_ids": [job.id]}, message="基准测试已提交，完成后可查询结果"
+    )
+
+
+@router.get("/benchmark-presets")
+async def get_benchmarks(preset: str | None = None):
+    """获取预设基准测试结果（按时间倒序）"""
+    return wrap_response(data=await list_benchmarks(preset))
@@ -0,0 +1,101 @@
+import asyncio
+import json
+
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+
+from for_ffmpeg.db import wrap_response
+from for_ffmpeg.history import analyze_history
+from for_ffmpeg.scheduler import scheduler
+
+# 创建 API 路由
+router = APIRouter()
+
+# SSE 推送间隔（秒）
+EVENT_INTERVAL = 1.0
+# 支持的任务操作
+JOB_ACTIONS = {"cancel": "取消", "pause": "暂停", "resume": "恢复"}
+
+
+@router.get("/jobs")
+async def list_jobs(state: str | None = None):
+    """获取任务列表，可按状态过滤"""
+    jobs = [
+        job.to_dict()
+        for job in scheduler.jobs.values()
+        if state is None or job.state == state
+    ]
+    return wrap_response(data={"summary": scheduler.summary(), "jobs": jobs})
+
+
+@router.get("/jobs/events")
+async def job_events(request: Request):
+    """以 Server-Sent Events 推送任务进度（只推送有变化的任务）与汇总信息"""
+
+    async def event_stream():
+        last_seen = 0.0
+        while not await request.is_disconnected():
+            changed = [
+                job.to_dict()
+                for job in scheduler.jobs.values()
+                if job.updated_at > last_seen or job.stalled
+            ]
+            last_seen = max((j["updated_at"] for j in changed), default=last_seen)
+            payload = {"summary": scheduler.summary(), "jobs": changed}
+            yield f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+            await asyncio.sleep(EVENT_INTERVAL)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/jobs/analytics")
+async def job_analytics(since: float | None = None):
+    """按预设统计执行历史（速度中位数、压缩比、失败率），since 为起始时间戳"""
+    return wrap_response(data=await analyze_history(since))
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """获取单个任务状态与进度"""
+    job = scheduler.get(job_id)
+    if job is not None:
+        return wrap_response(data=job.to_dict())
+    # 不在内存中的任务（如上次运行已完成的）从数据库读取
+    record = await scheduler.store.get(job_id) if scheduler.store else None
+    if record is None:
+        return wrap_response(message="任务不存在", status=2)
+    return wrap_response(data=record)
+
+
+@router.post("/jobs/{job_id}/{action}")
+async def control_job(job_id: str, action: str):
+    """取消 / 暂停 / 恢复单个任务（action 为 cancel、pause 或 resume）"""
+    if action not in JOB_ACTIONS:
+        return wrap_response(message=f"不支持的操作：{action}", status=2)
+    job = scheduler.get(job_id)
+    if job is None:
+        return wrap_response(message="任务不存在", status=2)
+    if not getattr(scheduler, action)(job):
+        return wrap_response(
+            message=f"任务当前状态为 {job.state}，无法{JOB_ACTIONS[action]}", status=2
+        )
+    return wrap_response(data=job.to_dict(), message=f"任务已{JOB_ACTIONS[action]}")
+
+
+@router.post("/batches/{batch_id}/{action}")
+async def control_batch(batch_id: str, action: str):
+    """取消 / 暂停 / 恢复整批任务，跳过状态不适用的任务"""
+    if action not in JOB_ACTIONS:
+        return wrap_response(message=f"不支持的操作：{action}", status=2)
+    jobs = scheduler.batch(batch_id)
+    if not jobs:
+        return wrap_response(message="批次不存在", status=2)
+    changed = sum(getattr(scheduler, action)(job) for job in jobs)
+    return wrap_response(
+        data={"total": len(jobs), "changed": changed},
+        message=f"已{JOB_ACTIONS[action]} {changed} 个任务",
+    )
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Boolean, Column, Float, Integer, String
 
 from for_ffmpeg.db import Base
 
@@ -27,3 +27,114 @@ class FfmpegCanmandDto(BaseModel):
     command: str
     # 可选
     description: str | None = None
+
+
+class FileIndex(Base):
+    """扫描过的文件/目录索引，目录 mtime 未变时跳过重新列举"""
+
+    __tablename__ = "file_index"
+    path = Column(String, primary_key=True)
+    parent = Column(String, index=True)
+    is_dir = Column(Boolean, nullable=False, default=False)
+    size = Column(Integer)
+    mtime = Column(Float)
+    ext = Column(String, index=True)
+    # 最近一次新增或发生变化时的扫描时间
+    changed_at = Column(Float, index=True)
+
+
+class MediaProbe(Base):
+    """ffprobe 结果缓存，以 (path, size, mtime) 为键，文件未变化时直接复用"""
+
+    __tablename__ = "media_probe"
+    path = Column(String, primary_key=True)
+    size = Column(Integer, primary_key=True)
+    mtime = Column(Float, primary_key=True)
+    # ffprobe 输出提炼后的 JSON
+    info = Column(String, nullable=False)
+
+
+class JobRecord(Base):
+    """持久化的转换/合并任务，启动时恢复未完成的任务"""
+
+    __tablename__ = "job_record"
+    id = Column(String, primary_key=True)
+    kind = Column(String, nullable=False)
+    # queued / running / done / failed
+    state = Column(String, nullable=False, index=True)
+    command = Column(String, nullable=False)
+    output = Column(String)
+    # 恢复执行所需的额外参数（JSON）
+    payload = Column(String)
+    exit_code = Column(Integer)
+    error = Column(String)
+    created_at = Column(Float, index=True)
+    started_at = Column(Float)
+    finished_at = Column(Float)
+    # 运行中的进程号，异常退出后重启时结束遗留的进程
+    pid = Column(Integer)
+
+
+class JobHistory(Base):
+    """已结束任务的执行记录，用于按预设统计吞吐、压缩比与失败率"""
+
+    __tablename__ = "job_history"
+    id = Column(String, primary_key=True)
+    kind = Column(String, nullable=False)
+    # 对应的 FfmpegCanmand 名称（多个预设以 + 连接），未保存的指令为空
+    preset = Column(String, index=True)
+    template = Column(String)
+    # done / failed / cancelled
+    state = Column(String, nullable=False)
+    exit_code = Column(Integer)
+    input_size = Column(Integer)
+    # 处理的媒体时长（秒）
+    duration = Column(Float)
+    output_size = Column(Integer)
+    wall_time = Column(Float)
+    # 编码速度倍率 = 媒体时长 / 耗时
+    speed = Column(Float)
+    finished_at = Column(Float, index=True)
+
+
+class PresetBenchmark(Base):
+    """预设基准测试结果（以 lavfi 生成的样本执行），用于对比预设性能及发现退化"""
+
+    __tablename__ = "preset_benchmark"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    preset = Column(String, nullable=False, index=True)
+    command = Column(String, nullable=False)
+    sample_seconds = Column(Integer)
+    state = Column(String)
+    error = Column(String)
+    fps = Column(Float)
+    speed = Column(Float)
+    # ffmpeg -benchmark 输出：用户态/内核态 CPU 时间、实际耗时（秒）及内存峰值
+    utime = Column(Float)
+    stime = Column(Float)
+    rtime = Column(Float)
+    maxrss_kb = Column(Integer)
+    output_size = Column(Integer)
+    created_at = Column(Float, index=True)
+
+
+class OutputStamp(Base):
+    """增量转换的输出戳：记录生成该输出时的输入状态与指令模板哈希"""
+
+    __tablename__ = "output_stamp"
+    output = Column(String, primary_key=True)
+    input = Column(String, nullable=False)
+    input_size = Column(Integer, nullable=False)
+    input_mtime = Column(Float, nullable=False)
+    cmd_hash = Column(String, nullable=False)
+    output_size = Column(Integer, nullable=False)
+    output_mtime = Column(Float, nullable=False)
+
+
+class SchemaVersion(Base):
+    """已执行的数据库迁移（见 migrations.py）"""
+
+    __tablename__ = "schema_version"
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    name = Column(String, nullable=False)
+    applied_at = Column(Float, nullable=False)
@@ -0,0 +1,26 @@
+from fastapi import APIRouter
+
+from for_ffmpeg.api.conf import load_conf_dict
+from for_ffmpeg.db import wrap_response
+from for_ffmpeg.watcher import watcher
+
+# 创建 API 路由
+router = APIRouter()
+
+
+@router.get("/watch-folder")
+async def watch_folder_status():
+    """目录监视状态"""
+    return wrap_response(data=watcher.status())
+
+
+@router.post("/watch-folder/reload")
+async def reload_watch_folder():
+    """保存配置参数后重新加载目录监视（WATCH_*）"""
+    await watcher.start(await load_conf_dict())
+    status = watcher.status()
+    if status["error"]:
+        return wrap_response(data=status, message=status["error"], status=2)
+    if not status["running"]:
+        return wrap_response(data=status, message="未配置监视目录", status=0)
+    return wrap_response(data=status, message="目录监视已启动")
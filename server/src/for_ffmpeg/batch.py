@@ -0,0 +1,214 @@
+import asyncio
+import fnmatch
+import json
+import os
+import uuid
+from itertools import islice
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from for_ffmpeg.engine import build_argv, format_argv
+from for_ffmpeg.file_index import normalize_root
+from for_ffmpeg.incremental import split_up_to_date
+from for_ffmpeg.scanner import iter_entries
+from for_ffmpeg.scheduler import Job, Priority, temp_output
+
+# 预演时每批处理（探测文件、查询输出戳）并写出的条目数
+PLAN_CHUNK_SIZE = 500
+
+
+class PatternError(ValueError):
+    """输出文件名格式无效"""
+
+
+def output_name(pattern: str, path: str) -> str:
+    """
+    按格式生成输出文件名
+
+    可用占位符：{name} 原文件名、{stem} 不含扩展名的文件名、{ext} 原扩展名（不含点）
+    """
+    name = os.path.basename(path)
+    stem, ext = os.path.splitext(name)
+    try:
+        result = pattern.format(name=name, stem=stem, ext=ext.lstrip("."))
+    except (KeyError, IndexError, ValueError) as e:
+        raise PatternError(f"输出文件名格式无效：{pattern}（{e}）") from e
+    if not result or "/" in result or "\\" in result:
+        raise PatternError(f"输出文件名格式无效：{pattern}")
+    return result
+
+
+def expand_folder(
+    folder: str,
+    output_pattern: str,
+    output_root: Optional[str] = None,
+    recursive: bool = True,
+    exts: Optional[List[str]] = None,
+    min_size: Optional[int] = None,
+    max_size: Optional[int] = None,
+    glob: Optional[str] = None,
+) -> Iterator[Tuple[str, str]]:
+    """
+    遍历目录并按条件过滤，逐个生成 (输入, 输出)
+
+    :param output_root: 输出目录，为空时输出到输入文件所在目录；子目录结构保持不变
+    :param exts: 扩展名（不区分大小写，可带点）
+    :param glob: 文件名通配符（不区分大小写）
+    """
+    folder = normalize_root(folder)
+    root = normalize_root(output_root) if output_root else folder
+    exts = {e.lower().lstrip(".") for e in exts or []}
+    glob = glob.lower() if glob else None
+    output_name(output_pattern, "sample.ext")
+    for entry in iter_entries(folder, recursive):
+        path, size = entry["path"], entry["size"]
+        name = os.path.basename(path)
+        if exts and os.path.splitext(name)[1].lower().lstrip(".") not in exts:
+            continue
+        if min_size is not None and size < min_size:
+            continue
+        if max_size is not None and size > max_size:
+            continue
+        if glob and not fnmatch.fnmatchcase(name.lower(), glob):
+            continue
+        yield path, output_path(path, folder, root, output_pattern)
+
+
+def output_path(path: str, folder: str, root: str, pattern: str) -> str:
+    """folder 下的文件 path 在输出目录 root 下对应的输出，子目录结构保持不变"""
+    rel = os.path.relpath(os.path.dirname(path), folder).replace("\\", "/")
+    out_dir = root if rel == "." else f"{root.rstrip('/')}/{rel}"
+    return f"{out_dir.rstrip('/')}/{output_name(pattern, path)}"
+
+
+def make_output_dirs(outputs: List[str]):
+    """创建输出目录（ffmpeg 不会自动创建）"""
+    for folder in {os.path.dirname(path) for path in outputs}:
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+
+def conversion_jobs(
+    todo: List[Tuple[str, str, Optional[dict]]],
+    template: str,
+    estimates: Dict[str, int],
+    priority: Priority = "normal",
+    batch: Optional[str] = None,
+) -> List[Job]:
+    """
+    按 (输入, 输出, 输出戳参数) 创建转换任务
+
+    输出先写入临时文件，成功后再原子替换（中断或失败时不会留下不完整的输出）；
+    有输出戳参数（增量转换）时成功后记录输出戳
+    """
+    jobs = []
+    for inf, ouf, stamp in todo:
+        job_id = uuid.uuid4().hex
+        # 输入与指令模板用于执行历史统计
+        payload = {
+            "input": inf,
+            "template": template,
+            "estimated_size": estimates.get(ouf, 0),
+        }
+        target = temp_output(ouf, job_id)
+        payload["temp_output"] = target
+        if stamp is not None:
+            payload["stamp"] = stamp
+        argv = build_argv(template, {"IN_PUT": inf, "OUT_PUT": target})
+        print(f"准备转换，指令：[{format_argv(argv)}]，输出文件：{ouf}")
+        jobs.append(
+            Job(
+                argv,
+                kind="convert",
+                output=ouf,
+                payload=payload,
+                job_id=job_id,
+                priority=priority,
+                batch=batch,
+            )
+        )
+    return jobs
+
+
+def _key(path: str) -> str:
+    # Windows 下路径不区分大小写
+    return os.path.normcase(os.path.normpath(path))
+
+
+class PlanChecker:
+    """检查批次内的输出冲突：重复的输出、输出覆盖输入"""
+
+    def __init__(self):
+        self.inputs: Dict[str, str] = {}
+        # 输出 -> 产生该输出的输入
+        self.outputs: Dict[str, str] = {}
+
+    def check(self, inf: str, ouf: str) -> List[str]:
+        in_key, out_key = _key(inf), _key(ouf)
+        conflicts = []
+        if out_key == in_key:
+            conflicts.append("输出将覆盖自身的输入")
+        elif out_key in self.inputs:
+            conflicts.append(f"输出将覆盖输入：{self.inputs[out_key]}")
+        if out_key in self.outputs:
+            conflicts.append(f"输出与 {self.outputs[out_key]} 的输出重复")
+        if in_key != out_key and in_key in self.outputs:
+            conflicts.append(f"输入将被 {self.outputs[in_key]} 的输出覆盖")
+        self.inputs.setdefault(in_key, inf)
+        self.outputs.setdefault(out_key, inf)
+        return conflicts
+
+
+def plan_conflicts(pairs: List[Tuple[str, str]]) -> List[str]:
+    """批次内的全部输出冲突，每项为 "输入：冲突原因" """
+    checker = PlanChecker()
+    return [
+        f"{inf}：{conflict}"
+        for inf, ouf in pairs
+        for conflict in checker.check(inf, ouf)
+    ]
+
+
+def _exists_all(pairs: List[Tuple[str, str]]) -> Dict[str, bool]:
+    return {p: os.path.isfile(p) for pair in pairs for p in pair}
+
+
+async def iter_plan(
+    pairs: Iterator[Tuple[str, str]], template: str, incremental: bool = False
+) -> AsyncIterator[str]:
+    """
+    预演转换批次（不执行）：逐批展开指令并检查冲突，输出 NDJSON
+
+    每行为一个文件 {input, output, command, exists, skipped, conflicts}，最后一行为汇总
+    """
+    checker = PlanChecker()
+    summary = {"total": 0, "skipped": 0, "existing": 0, "conflicts": 0}
+    while True:
+        chunk = await asyncio.to_thread(lambda: list(islice(pairs, PLAN_CHUNK_SIZE)))
+        if not chunk:
+            break
+        exists = await asyncio.to_thread(_exists_all, chunk)
+        skipped = set()
+        if incremental:
+            skipped = set((await split_up_to_date(chunk, template))[1])
+        lines = []
+        for inf, ouf in chunk:
+            conflicts = checker.check(inf, ouf)
+            if not exists[inf]:
+                conflicts.append("输入文件不存在")
+            row = {
+                "input": inf,
+                "output": ouf,
+                "command": format_argv(
+                    build_argv(template, {"IN_PUT": inf, "OUT_PUT": ouf})
+                ),
+                "exists": exists[ouf],
+                "skipped": (inf, ouf) in skipped,
+                "conflicts": conflicts,
+            }
+            summary["total"] += 1
+            summary["skipped"] += row["skipped"]
+            summary["existing"] += row["exists"]
+            summary["conflicts"] += bool(conflicts)
+            lines.append(json.dumps(row, ensure_ascii=False) + "\n")
+        yield "".join(lines)
+    yield json.dumps({"summary": summary}, ensure_ascii=False) + "\n"
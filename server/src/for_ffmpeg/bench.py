@@ -0,0 +1,171 @@
+import asyncio
+import os
+import re
+import time
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from environment import get_my_documents
+from sqlalchemy import select
+
+from for_ffmpeg.api.models import PresetBenchmark
+from for_ffmpeg.cache import command_cache
+from for_ffmpeg.db import AsyncSessionLocal
+from for_ffmpeg.engine import TemplateError, build_argv, compile_template
+from for_ffmpeg.scheduler import Job, scheduler
+
+# 样本与测试输出所在目录
+BENCH_DIR = Path(get_my_documents()) / "tool-oxr" / "benchmark"
+# 用 lavfi 生成确定性的音视频样本（单线程 + bitexact，相同参数生成的文件一致）
+SAMPLE_TEMPLATE = (
+    "ffmpeg -y -f lavfi -i testsrc2=size=1280x720:rate=30:duration=DURATION"
+    " -f lavfi -i sine=frequency=440:sample_rate=48000:duration=DURATION"
+    " -c:v libx264 -preset veryfast -crf 18 -pix_fmt yuv420p -threads 1"
+    " -c:a aac -b:a 192k -fflags +bitexact -flags:v +bitexact -flags:a +bitexact"
+    " -map_metadata -1 -shortest OUT_PUT"
+)
+DEFAULT_SAMPLE_SECONDS = 10
+# 未指定扩展名时的输出容器（几乎可容纳任意编码）
+DEFAULT_BENCH_EXT = "mkv"
+_BENCH_TIMES = re.compile(r"bench: utime=([\d.]+)s stime=([\d.]+)s rtime=([\d.]+)s")
+_BENCH_RSS = re.compile(r"bench: maxrss=(\d+)\s*[kK]i?B")
+# 等待其他任务结束的检查间隔（秒）
+IDLE_POLL_INTERVAL = 1
+
+
+def _sample_path(seconds: int) -> str:
+    return (BENCH_DIR / f"sample_{seconds}s.mp4").as_posix()
+
+
+def parse_bench(stderr_tail: List[str]) -> dict:
+    """解析 ffmpeg -benchmark 输出的 CPU 时间与内存峰值"""
+    result = {}
+    for line in stderr_tail:
+        times = _BENCH_TIMES.search(line)
+        if times:
+            utime, stime, rtime = (float(v) for v in times.groups())
+            result.update(utime=utime, stime=stime, rtime=rtime)
+        rss = _BENCH_RSS.search(line)
+        if rss:
+            result["maxrss_kb"] = int(rss.group(1))
+    return result
+
+
+def _bench_argv(template: str, sample: str, output: str) -> List[str]:
+    if not any("IN_PUT" in token for token in compile_template(template)):
+        raise TemplateError("指令模板缺少输入占位符 IN_PUT")
+    argv = build_argv(template, {"IN_PUT": sample, "OUT_PUT": output})
+    return [argv[0], "-benchmark", *argv[1:]]
+
+
+def submit_benchmark(
+    presets: Optional[List[str]] = None,
+    seconds: int = DEFAULT_SAMPLE_SECONDS,
+    exts: Optional[Dict[str, str]] = None,
+) -> Job:
+    """
+    提交预设基准测试：生成样本后逐个执行预设，结果写入 preset_benchmark
+
+    每个预设都等调度器空闲（没有运行中或排队的任务）后再执行，避免与其他批次争抢 CPU；
+    测试期间新提交的任务仍会并发执行，此时的结果偏慢
+    """
+    job = Job(["benchmark", *(presets or [])], kind="benchmark", persist=False)
+    scheduler.track(job)
+    scheduler.mark_running(job)
+    job.task = scheduler.spawn(run_benchmark(job, presets, seconds, exts or {}))
+    return job
+
+
+async def run_benchmark(
+    job: Job, presets: Optional[List[str]], seconds: int, exts: Dict[str, str]
+):
+    # 每次测试的输出放在单独的目录中，同时进行的多次测试互不影响
+    await scheduler.orchestrate(
+        job,
+        partial(_run_presets, job, presets, seconds, exts),
+        "预设基准测试",
+        "run-",
+        BENCH_DIR.as_posix(),
+    )
+
+
+async def _run_presets(
+    job: Job,
+    presets: Optional[List[str]],
+    seconds: int,
+    exts: Dict[str, str],
+    workdir: str,
+):
+    commands = command_cache.values()
+    if presets:
+        commands = [c for c in commands if c["name"] in presets]
+    # 合并指令（FILE_LIST_TEXT）不适用于单个样本
+    commands = [
+        c for c in commands if c["command"] and "FILE_LIST_TEXT" not in c["command"]
+    ]
+    sample = _sample_path(seconds)
+    if not os.path.isfile(sample):
+        job.set_stage("sample")
+        target = f"{workdir}/sample.mp4"
+        argv = build_argv(
+            SAMPLE_TEMPLATE, {"DURATION": str(seconds), "OUT_PUT": target}
+        )
+        gen = Job(argv, kind="bench-sample", output=target, persist=False)
+        if not await scheduler.run_all(scheduler.adopt(job, [gen])):
+            raise RuntimeError(f"生成样本失败：{gen.error}")
+        await asyncio.to_thread(os.replace, target, sample)
+
+    results = []
+    for done, command in enumerate(commands):
+        # 逐个执行，避免预设之间互相争抢 CPU
+        job.set_stage("benchmark", done, len(commands))
+        ext = exts.get(command["name"], DEFAULT_BENCH_EXT).lstrip(".")
+        output = f"{workdir}/out_{done:03d}.{ext}"
+        record = PresetBenchmark(
+            preset=command["name"],
+            command=command["command"],
+            sample_seconds=seconds,
+            created_at=time.time(),
+        )
+        try:
+            argv = _bench_argv(command["command"], sample, output)
+        except TemplateError as e:
+            record.state, record.error = "failed", str(e)
+            results.append(record)
+            continue
+        if scheduler.busy():
+            job.set_stage("waiting", done, len(commands))
+            while scheduler.busy():
+                await asyncio.sleep(IDLE_POLL_INTERVAL)
+            job.set_stage("benchmark", done, len(commands))
+        bench = Job(argv, kind="bench", output=output, persist=False)
+        await scheduler.run_all(scheduler.adopt(job, [bench]))
+        record.state, record.error = bench.state, bench.error
+        record.fps = bench.progress.get("fps")
+        record.speed = bench.progress.get("speed")
+        for key, value in parse_bench(bench.stderr_tail).items():
+            setattr(record, key, value)
+        if bench.state == "done" and os.path.isfile(output):
+            record.output_size = os.path.getsize(output)
+        if os.path.exists(output):
+            os.remove(output)
+        results.append(record)
+    job.set_stage("benchmark", len(commands), len(commands))
+
+    async with AsyncSessionLocal() as session:
+        session.add_all(results)
+        await session.commit()
+
+
+async def list_benchmarks(preset: Optional[str] = None) -> List[dict]:
+    """基准测试结果，按时间倒序，便于对比同一预设的历次结果"""
+    stmt = select(PresetBenchmark).order_by(PresetBenchmark.created_at.desc())
+    if preset:
+        stmt = stmt.where(PresetBenchmark.preset == preset)
+    async with AsyncSessionLocal() as session:
+        rows = (await session.execute(stmt)).scalars().all()
+    return [
+        {c.name: getattr(row, c.name) for c in PresetBenchmark.__table__.columns}
+        for row in rows
+    ]
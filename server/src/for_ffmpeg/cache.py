@@ -0,0 +1,67 @@
+import uuid
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select
+
+from for_ffmpeg.api.models import ConfParam, FfmpegCanmand
+from for_ffmpeg.db import AsyncSessionLocal
+
+# 版本号每次启动都从头计数，ETag 中加入启动标识，避免与上次运行的 ETag 相同
+BOOT_ID = uuid.uuid4().hex[:8]
+
+
+class TableCache:
+    """整表缓存：启动时加载，保存接口提交后重新加载，读取时直接查字典"""
+
+    def __init__(self, model):
+        self.model = model
+        self.key = model.__table__.primary_key.columns.values()[0].name
+        self.rows: Dict[Any, dict] = {}
+        # 每次重新加载时递增，客户端可据此判断数据是否变化
+        self.version = 0
+
+    async def load(self):
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(select(*self.model.__table__.columns))
+            rows = [dict(row) for row in result.mappings()]
+        # 整体替换，读取方不会看到加载到一半的数据
+        self.rows = {row[self.key]: row for row in rows}
+        self.version += 1
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.model.__tablename__}-{BOOT_ID}-{self.version}"'
+
+    def get(self, key) -> Optional[dict]:
+        return self.rows.get(key)
+
+    def values(self) -> List[dict]:
+        return list(self.rows.values())
+
+
+conf_cache = TableCache(ConfParam)
+command_cache = TableCache(FfmpegCanmand)
+
+
+async def load_caches():
+    await conf_cache.load()
+    await command_cache.load()
+
+
+def conf_dict() -> Dict[str, str]:
+    """全部配置参数 {pkey: pvalue}"""
+    return {row["pkey"]: row["pvalue"] for row in conf_cache.values()}
+
+
+def preset_command(name: str) -> Optional[str]:
+    """预设名称对应的指令模板"""
+    row = command_cache.get(name)
+    return row["command"] if row else None
+
+
+def preset_name(template: str) -> Optional[str]:
+    """指令模板对应的预设名称（第一个匹配的预设）"""
+    for row in command_cache.values():
+        if row["command"] == template:
+            return row["name"]
+    return None
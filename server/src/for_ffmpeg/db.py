@@ -1,12 +1,65 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+import os
+from typing import List, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, event, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 from environment import get_db_path
 
 
 DATABASE_URL = f"sqlite+aiosqlite:///{get_db_path()}"
 
+# 连接时设置的 PRAGMA，可通过环境变量 OXR_DB_PROFILE 选择
+DB_PROFILES = {
+    # WAL：读写互不阻塞，提交时只追加日志；NORMAL 在 WAL 下只在检查点时 fsync
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        # 负数表示 KiB，即 64 MB
+        "cache_size": -64 * 1024,
+        "busy_timeout": 5000,
+        "temp_store": "MEMORY",
+    },
+    # SQLite 默认设置（回滚日志 + FULL 同步），用于对比或排查问题
+    "safe": {"busy_timeout": 5000},
+}
+DB_PROFILE = os.environ.get("OXR_DB_PROFILE", "fast")
+# OXR_DB_DEBUG=1 时输出全部 SQL
+DB_DEBUG = os.environ.get("OXR_DB_DEBUG") == "1"
+# 连接池：WAL 下多个读连接可与一个写连接并发
+POOL_SIZE = 5
+POOL_MAX_OVERFLOW = 5
+
+
+def make_engine(
+    url: str, profile: str = DB_PROFILE, echo: bool = DB_DEBUG
+) -> AsyncEngine:
+    """创建异步引擎，每个新连接按 profile 设置 PRAGMA"""
+    pragmas = DB_PROFILES.get(profile, DB_PROFILES["fast"])
+    engine = create_async_engine(
+        url,
+        echo=echo,
+        pool_size=POOL_SIZE,
+        max_overflow=POOL_MAX_OVERFLOW,
+        # 本地文件连接不会失效，无需 pre_ping；定期回收以释放 mmap
+        pool_recycle=3600,
+    )
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for key, value in pragmas.items():
+            cursor.execute(f"PRAGMA {key}={value}")
+        cursor.close()
+
+    return engine
+
+
 # 创建异步引擎
-engine = create_async_engine(DATABASE_URL, echo=True, future=True)
+engine = make_engine(DATABASE_URL)
 
 # 创建异步Session
 AsyncSessionLocal = sessionmaker(
@@ -19,8 +72,12 @@ Base = declarative_base()
 
 async def init_db():
     """初始化数据库"""
+    # 避免循环导入（migrations 依赖模型，模型依赖 Base）
+    from for_ffmpeg.migrations import migrate
+
     async with engine.begin() as conn:
-        # 创建所有表
+        # 先升级已有的表，再创建缺少的表
+        await conn.run_sync(migrate)
         await conn.run_sync(Base.metadata.create_all)
     print(f"数据库初始化完成，路径：{get_db_path()}")
 
@@ -31,6 +88,58 @@ async def get_db():
         yield session
 
 
+async def sync_rows(session: AsyncSession, model, rows: List[dict]) -> dict:
+    """
+    按主键比较后整体保存：只插入新增、更新变化、删除移除的行（各一条语句），调用方提交事务
+
+    :return: 各类变更的行数 {inserted, updated, deleted}
+    """
+    key = model.__table__.primary_key.columns.values()[0]
+    columns = [c.name for c in model.__table__.columns]
+    result = await session.execute(select(*model.__table__.columns))
+    current = {row[key.name]: dict(row) for row in result.mappings()}
+    # 重复的键以最后一个为准
+    wanted = {row[key.name]: row for row in rows}
+    inserts = [row for k, row in wanted.items() if k not in current]
+    updates = [
+        row
+        for k, row in wanted.items()
+        if k in current and any(current[k][c] != row.get(c) for c in columns)
+    ]
+    removed = [k for k in current if k not in wanted]
+    if inserts:
+        await session.execute(insert(model), inserts)
+    if updates:
+        # 按主键批量更新
+        await session.execute(update(model), updates)
+    if removed:
+        await session.execute(delete(model).where(key.in_(removed)))
+    return {"inserted": len(inserts), "updated": len(updates), "deleted": len(removed)}
+
+
 # 包装接口返回
 def wrap_response(data=None, message="success", status=1):
     return {"status": status, "message": message, "data": data}
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """请求头 If-None-Match 与 etag 匹配时返回 304 响应，否则返回 None"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    tags = [t.strip().removeprefix("W/") for t in header.split(",")]
+    if "*" in tags or etag.removeprefix("W/") in tags:
+        return Response(status_code=304, headers=etag_headers(etag))
+    return None
+
+
+def etag_headers(etag: str) -> dict:
+    # no-cache：可以缓存，但每次使用前都需带 If-None-Match 校验
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+# 包装接口返回，并附带 ETag
+def wrap_etag_response(etag: str, data=None, message="success", status=1):
+    return JSONResponse(
+        wrap_response(data, message, status), headers=etag_headers(etag)
+    )
@@ -0,0 +1,245 @@
+import asyncio
+import os
+import re
+import subprocess
+import sys
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+import psutil
+
+from for_ffmpeg.progress import ProgressParser
+
+# 保留的 stderr 末尾行数
+STDERR_TAIL_LINES = 50
+# 机器可读的进度输出参数，插入在 ffmpeg 可执行文件之后
+PROGRESS_ARGS = ["-progress", "pipe:1", "-nostats", "-nostdin"]
+# 直接执行（不经过 shell），模板中不支持这些 shell 语法
+SHELL_TOKENS = {"&&", "||", "|", ";", ">", ">>", "<", "&"}
+_TOKEN = re.compile(r"""(?:"[^"]*"|'[^']*'|[^\s"'])+""")
+_QUOTE = re.compile(r""""([^"]*)"|'([^']*)'""")
+
+
+class TemplateError(ValueError):
+    """指令模板无法解析"""
+
+
+@lru_cache(maxsize=256)
+def compile_template(template: str) -> Tuple[str, ...]:
+    """
+    将指令模板解析为参数列表（只解析一次并缓存）
+
+    按空白切分，单/双引号内的空白保留，不处理反斜杠转义（兼容 Windows 路径）
+    """
+    if _TOKEN.sub("", template).strip():
+        # 未被任何参数匹配的只可能是缺少配对的引号
+        raise TemplateError("指令模板的引号不配对")
+    argv = []
+    for token in _TOKEN.findall(template.strip()):
+        if token in SHELL_TOKENS:
+            raise TemplateError(f"指令模板不支持 shell 语法：{token}")
+        argv.append(_QUOTE.sub(lambda m: m.group(1) or m.group(2) or "", token))
+    if not argv:
+        raise TemplateError("指令模板为空")
+    return tuple(argv)
+
+
+@lru_cache(maxsize=32)
+def _placeholders(keys: Tuple[str, ...]) -> re.Pattern:
+    # 较长的占位符优先匹配
+    return re.compile("|".join(map(re.escape, sorted(keys, key=len, reverse=True))))
+
+
+def build_argv(template: str, values: Dict[str, str]) -> List[str]:
+    """
+    按占位符（IN_PUT / OUT_PUT / FILE_LIST_TEXT 等）替换生成参数列表
+
+    一次替换所有占位符，替换进来的值（如包含 OUT_PUT 的路径）不会被再次替换
+    """
+    argv = list(compile_template(template))
+    if not values:
+        return argv
+    pattern = _placeholders(tuple(values))
+    return [pattern.sub(lambda m: values[m.group(0)], token) for token in argv]
+
+
+def split_io(template: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """拆分指令模板：输入部分（至 IN_PUT 为止）与输出部分（以 OUT_PUT 结尾）"""
+    argv = compile_template(template)
+    inputs = [i for i, token in enumerate(argv) if "IN_PUT" in token]
+    if len(inputs) != 1:
+        raise TemplateError("指令模板需要且只能有一个输入占位符 IN_PUT")
+    head, tail = argv[: inputs[0] + 1], argv[inputs[0] + 1 :]
+    if sum("OUT_PUT" in token for token in tail) != 1 or "OUT_PUT" not in tail[-1]:
+        raise TemplateError("指令模板需要在 IN_PUT 之后且以输出占位符 OUT_PUT 结尾")
+    return head, tail
+
+
+def build_multi_output_argv(
+    templates: List[str], src: str, outputs: List[str]
+) -> List[str]:
+    """
+    将多个指令模板合并为一次调用：输入只解码一次，依次写出各个输出
+
+    各模板输入部分（含 -i 之前的参数）必须一致，输出部分按顺序拼接
+    """
+    if not templates or len(templates) != len(outputs):
+        raise TemplateError("指令模板与输出文件数量不一致")
+    parts = [split_io(template) for template in templates]
+    head = parts[0][0]
+    if any(h != head for h, _ in parts[1:]):
+        raise TemplateError("各指令模板的输入部分不一致，无法合并为一次调用")
+    argv = [token.replace("IN_PUT", src) for token in head]
+    for (_, tail), output in zip(parts, outputs):
+        argv.extend(token.replace("OUT_PUT", output) for token in tail)
+    return argv
+
+
+def format_argv(argv: List[str]) -> str:
+    """用于展示/日志的命令行字符串"""
+    return subprocess.list2cmdline(argv)
+
+
+def is_ffmpeg(argv: List[str]) -> bool:
+    name = os.path.basename(argv[0]).lower() if argv else ""
+    return name in ("ffmpeg", "ffmpeg.exe")
+
+
+def with_progress(argv: List[str]) -> List[str]:
+    """为 ffmpeg 加上 -progress 输出，其他程序原样返回"""
+    if not is_ffmpeg(argv) or "-progress" in argv:
+        return list(argv)
+    return [argv[0], *PROGRESS_ARGS, *argv[1:]]
+
+
+class RunResult:
+    def __init__(self, exit_code: int, stderr_tail: List[str]):
+        self.exit_code = exit_code
+        self.stderr_tail = stderr_tail
+
+
+def _creationflags() -> int:
+    # 输出由后端读取，Windows 下不再弹出控制台窗口
+    return subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+
+
+def _process_tree(pid: int) -> List[psutil.Process]:
+    try:
+        parent = psutil.Process(pid)
+        return [parent, *parent.children(recursive=True)]
+    except psutil.Error:
+        return []
+
+
+def signal_tree(pid: int, action: str):
+    """对进程及其所有子进程执行 kill / suspend / resume"""
+    for proc in _process_tree(pid):
+        try:
+            getattr(proc, action)()
+        except psutil.Error:
+            # 进程已退出或无权限，忽略
+            continue
+
+
+def kill_orphan(pid: int, program: str, started_at: Optional[float]) -> bool:
+    """
+    结束上次运行遗留的进程树（程序异常退出时子进程不会随之结束）；
+    进程号可能已被复用，只有程序名一致且启动时间不早于任务开始时间时才结束
+
+    :return: 是否结束了进程
+    """
+    try:
+        proc = psutil.Process(pid)
+        name = os.path.splitext(proc.name())[0].lower()
+        created = proc.create_time()
+    except psutil.Error:
+        return False
+    wanted = os.path.splitext(os.path.basename(program))[0].lower()
+    if name != wanted or (started_at and created < started_at - 1):
+        return False
+    signal_tree(pid, "kill")
+    return True
+
+
+def _decode(line: bytes) -> str:
+    return line.decode("utf-8", errors="replace").rstrip("\r\n")
+
+
+async def run_argv(
+    argv: List[str],
+    on_progress: Optional[Callable[[dict], None]] = None,
+    on_spawn: Optional[Callable[[int], None]] = None,
+) -> RunResult:
+    """
+    直接执行参数列表（不经过 shell），增量解析进度并保留 stderr 末尾
+
+    :param on_progress: 每个进度块结束时回调
+    :param on_spawn: 进程启动后以 pid 回调（用于取消/暂停）
+    """
+    argv = with_progress(argv)
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *argv,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            creationflags=_creationflags(),
+        )
+    except NotImplementedError:
+        # Windows 的 SelectorEventLoop（如 uvicorn --reload）不支持子进程，改用线程
+        return await asyncio.to_thread(_run_blocking, argv, on_progress, on_spawn)
+    if on_spawn:
+        on_spawn(proc.pid)
+    parser = ProgressParser()
+    tail = deque(maxlen=STDERR_TAIL_LINES)
+
+    async def read_stdout():
+        async for line in proc.stdout:
+            progress = parser.feed(_decode(line))
+            if progress and on_progress:
+                on_progress(progress)
+
+    async def read_stderr():
+        async for line in proc.stderr:
+            tail.append(_decode(line))
+
+    try:
+        await asyncio.gather(read_stdout(), read_stderr())
+        exit_code = await proc.wait()
+    except asyncio.CancelledError:
+        if proc.returncode is None:
+            # 连同子进程一起结束，并等待退出，避免关闭时遗留进程
+            signal_tree(proc.pid, "kill")
+            await proc.wait()
+        raise
+    return RunResult(exit_code, list(tail))
+
+
+def _run_blocking(argv, on_progress, on_spawn) -> RunResult:
+    proc = subprocess.Popen(
+        argv,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        creationflags=_creationflags(),
+    )
+    if on_spawn:
+        on_spawn(proc.pid)
+    tail = deque(maxlen=STDERR_TAIL_LINES)
+
+    def read_stderr():
+        for line in proc.stderr:
+            tail.append(_decode(line))
+
+    stderr_thread = threading.Thread(target=read_stderr, daemon=True)
+    stderr_thread.start()
+    parser = ProgressParser()
+    for line in proc.stdout:
+        progress = parser.feed(_decode(line))
+        if progress and on_progress:
+            on_progress(progress)
+    exit_code = proc.wait()
+    stderr_thread.join()
+    return RunResult(exit_code, list(tail))
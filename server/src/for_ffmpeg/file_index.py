@@ -0,0 +1,166 @@
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, delete, or_, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from for_ffmpeg.api.models import FileIndex
+
+# 批量写入/删除时每批的条数（避免超出 SQLite 变量上限）
+BATCH_SIZE = 500
+
+
+def normalize_root(path: str) -> str:
+    path = path.replace("\\", "/")
+    # 保留根目录（"/" 或 "C:/"）末尾的斜杠
+    if path == "/" or path.endswith(":/"):
+        return path
+    return path.rstrip("/")
+
+
+def _under(root: str):
+    """
+    root 本身及其下所有条目
+
+    使用范围条件 root/ <= path < root0（"0" 是 "/" 的下一个字符）：
+    区分大小写且可以使用索引（LIKE 前缀匹配默认不区分大小写，也无法使用索引）
+    """
+    prefix = root.rstrip("/")
+    return or_(
+        FileIndex.path == root,
+        and_(FileIndex.path >= prefix + "/", FileIndex.path < prefix + "0"),
+    )
+
+
+def _record(path: str, parent: str, is_dir: bool, st, now: float) -> dict:
+    return {
+        "path": path,
+        "parent": parent,
+        "is_dir": is_dir,
+        "size": 0 if is_dir else st.st_size,
+        "mtime": st.st_mtime,
+        "ext": "" if is_dir else os.path.splitext(path)[1].lower().lstrip("."),
+        "changed_at": now,
+    }
+
+
+def diff_tree(root: str, known: Dict[str, tuple], now: float) -> dict:
+    """
+    对比文件系统与索引，只列举 mtime 发生变化的目录
+
+    :param known: 索引中已有条目 path -> (parent, is_dir, size, mtime)
+    :return: {"upserts": [记录], "removed": [路径]}
+    """
+    children: Dict[str, List[str]] = {}
+    for path, (parent, *_) in known.items():
+        children.setdefault(parent, []).append(path)
+
+    def subtree(path: str) -> List[str]:
+        paths, stack = [], [path]
+        while stack:
+            p = stack.pop()
+            paths.append(p)
+            stack.extend(children.get(p, []))
+        return paths
+
+    upserts, removed = [], []
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            st = os.stat(current)
+        except OSError:
+            removed.extend(subtree(current))
+            continue
+        old = known.get(current)
+        if old and old[1] and old[3] == st.st_mtime:
+            # 目录本身未变化：沿用索引中的文件，仅继续检查子目录
+            stack.extend(c for c in children.get(current, []) if known[c][1])
+            continue
+        upserts.append(_record(current, os.path.dirname(current), True, st, now))
+        seen = set()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    path = f"{current.rstrip('/')}/{entry.name}"
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            seen.add(path)
+                            stack.append(path)
+                        elif entry.is_file():
+                            seen.add(path)
+                            est = entry.stat()
+                            prev = known.get(path)
+                            if (
+                                prev is None
+                                or prev[2] != est.st_size
+                                or prev[3] != est.st_mtime
+                            ):
+                                upserts.append(_record(path, current, False, est, now))
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"扫描目录失败: {current}, {e}")
+            continue
+        for child in children.get(current, []):
+            if child not in seen:
+                removed.extend(subtree(child))
+    return {"upserts": upserts, "removed": removed}
+
+
+async def refresh_index(session: AsyncSession, root: str) -> dict:
+    """增量刷新 root 下的索引，返回本次新增/变化与删除的文件"""
+    root = normalize_root(root)
+    result = await session.execute(
+        select(
+            FileIndex.path,
+            FileIndex.parent,
+            FileIndex.is_dir,
+            FileIndex.size,
+            FileIndex.mtime,
+        ).where(_under(root))
+    )
+    known = {row[0]: tuple(row[1:]) for row in result.all()}
+    now = time.time()
+    diff = await asyncio.to_thread(diff_tree, root, known, now)
+    upserts, removed = diff["upserts"], diff["removed"]
+    for i in range(0, len(upserts), BATCH_SIZE):
+        stmt = insert(FileIndex)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[FileIndex.path],
+            set_={
+                c: stmt.excluded[c]
+                for c in ("parent", "is_dir", "size", "mtime", "ext", "changed_at")
+            },
+        )
+        await session.execute(stmt, upserts[i : i + BATCH_SIZE])
+    for i in range(0, len(removed), BATCH_SIZE):
+        await session.execute(
+            delete(FileIndex).where(FileIndex.path.in_(removed[i : i + BATCH_SIZE]))
+        )
+    await session.commit()
+    removed_files = [p for p in removed if p in known and not known[p][1]]
+    return {
+        "scanned_at": now,
+        "changed": [r["path"] for r in upserts if not r["is_dir"]],
+        "removed": removed_files,
+    }
+
+
+async def query_index(
+    session: AsyncSession, root: str, since: Optional[float] = None
+) -> List[dict]:
+    """从索引读取 root 下的文件，since 为时间戳时只返回此后新增/变化的文件"""
+    stmt = select(FileIndex).where(
+        _under(normalize_root(root)), FileIndex.is_dir.is_(False)
+    )
+    if since is not None:
+        stmt = stmt.where(FileIndex.changed_at > since)
+    result = await session.execute(stmt.order_by(FileIndex.path))
+    return [
+        {"path": f.path, "size": f.size, "mtime": f.mtime, "ext": f.ext}
+        for f in result.scalars().all()
+    ]
@@ -0,0 +1,138 @@
+import asyncio
+import os
+import statistics
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+
+from for_ffmpeg.api.models import JobHistory
+from for_ffmpeg.cache import preset_name
+from for_ffmpeg.db import AsyncSessionLocal
+from for_ffmpeg.probe import probe_files
+from for_ffmpeg.scheduler import Job
+
+# 记录执行历史的任务类型（编排产生的子任务不记录）
+HISTORY_KINDS = ("convert", "merge", "merge-tree", "segment")
+
+
+def _total_size(paths: List[str]) -> Optional[int]:
+    sizes = [os.path.getsize(p) for p in paths if p and os.path.isfile(p)]
+    return sum(sizes) if sizes else None
+
+
+def _inputs(payload: dict) -> List[str]:
+    if payload.get("input"):
+        return [payload["input"]]
+    if payload.get("src"):
+        return [payload["src"]]
+    return payload.get("files") or []
+
+
+async def _duration(job: Job) -> Optional[float]:
+    """
+    媒体时长（秒）：ffmpeg 任务取进度中的 out_time；
+    编排任务（分段转码、分层合并）的进度为阶段信息，取输入探测缓存中的时长之和
+    """
+    if "out_time" in job.progress:
+        return job.progress["out_time"]
+    inputs = _inputs(job.payload)
+    if "stage" not in job.progress or not inputs:
+        return None
+    async with AsyncSessionLocal() as session:
+        infos = await probe_files(session, inputs, cached_only=True)
+    durations = [infos.get(path, {}).get("duration") for path in inputs]
+    # 部分输入没有缓存时不记录，避免时长偏小
+    if not all(durations):
+        return None
+    return sum(durations)
+
+
+def _preset_name(job: Job) -> Optional[str]:
+    if job.payload.get("presets"):
+        return "+".join(job.payload["presets"])
+    template = job.payload.get("template")
+    return preset_name(template) if template else None
+
+
+async def record_history(job: Job):
+    """任务结束回调：写入执行历史"""
+    if not job.persist or job.kind not in HISTORY_KINDS:
+        return
+    outputs = job.payload.get("outputs") or [job.output]
+    input_size = await asyncio.to_thread(_total_size, _inputs(job.payload))
+    output_size = None
+    if job.state == "done":
+        output_size = await asyncio.to_thread(_total_size, outputs)
+    wall_time = None
+    if job.started_at and job.finished_at:
+        wall_time = job.finished_at - job.started_at
+    duration = await _duration(job)
+    speed = duration / wall_time if duration and wall_time else None
+    async with AsyncSessionLocal() as session:
+        values = {
+            "id": job.id,
+            "kind": job.kind,
+            "preset": _preset_name(job),
+            "template": job.payload.get("template"),
+            "state": job.state,
+            "exit_code": job.exit_code,
+            "input_size": input_size,
+            "duration": duration,
+            "output_size": output_size,
+            "wall_time": wall_time,
+            "speed": speed,
+            "finished_at": job.finished_at,
+        }
+        stmt = insert(JobHistory).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[JobHistory.id],
+            set_={k: v for k, v in values.items() if k != "id"},
+        )
+        await session.execute(stmt)
+        await session.commit()
+
+
+def _median(values: List[float]) -> Optional[float]:
+    values = [v for v in values if v is not None]
+    return statistics.median(values) if values else None
+
+
+async def analyze_history(since: Optional[float] = None) -> List[dict]:
+    """按预设汇总执行历史：成功率、速度与耗时中位数、压缩比"""
+    stmt = select(JobHistory)
+    if since is not None:
+        stmt = stmt.where(JobHistory.finished_at >= since)
+    async with AsyncSessionLocal() as session:
+        rows = (await session.execute(stmt)).scalars().all()
+    groups: Dict[tuple, List[JobHistory]] = {}
+    for row in rows:
+        # 未保存为预设的指令按模板分组
+        groups.setdefault((row.preset, row.template), []).append(row)
+    results = []
+    for (preset, template), items in groups.items():
+        done = [r for r in items if r.state == "done"]
+        failed = [r for r in items if r.state == "failed"]
+        sized = [r for r in done if r.input_size and r.output_size is not None]
+        finished = len(done) + len(failed)
+        results.append(
+            {
+                "preset": preset,
+                "template": template,
+                "jobs": len(items),
+                "done": len(done),
+                "failed": len(failed),
+                "failure_rate": len(failed) / finished if finished else None,
+                "median_speed": _median([r.speed for r in done]),
+                "median_wall_time": _median([r.wall_time for r in done]),
+                # 输出总大小 / 输入总大小
+                "compression_ratio": (
+                    sum(r.output_size for r in sized) / sum(r.input_size for r in sized)
+                    if sized
+                    else None
+                ),
+                "total_duration": sum(r.duration or 0 for r in done),
+            }
+        )
+    results.sort(key=lambda r: r["jobs"], reverse=True)
+    return results
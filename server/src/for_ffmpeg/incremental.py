@@ -0,0 +1,98 @@
+import asyncio
+import hashlib
+import os
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+
+from for_ffmpeg.api.models import OutputStamp
+from for_ffmpeg.db import AsyncSessionLocal
+from for_ffmpeg.scheduler import Job
+
+# 查询输出戳时每批的路径数
+BATCH_SIZE = 500
+
+
+def cmd_hash(template: str) -> str:
+    return hashlib.sha1(template.strip().encode("utf-8")).hexdigest()
+
+
+def _stat(path: str) -> Optional[Tuple[int, float]]:
+    try:
+        st = os.stat(path)
+        return st.st_size, st.st_mtime
+    except OSError:
+        return None
+
+
+def _stat_pairs(pairs: List[Tuple[str, str]]) -> Dict[str, Optional[tuple]]:
+    stats = {}
+    for inf, ouf in pairs:
+        stats[inf] = _stat(inf)
+        stats[ouf] = _stat(ouf)
+    return stats
+
+
+async def split_up_to_date(
+    pairs: List[Tuple[str, str]], template: str
+) -> Tuple[List[Tuple[str, str, dict]], List[Tuple[str, str]]]:
+    """
+    类似 make：输出存在、比输入新，且输出戳中的输入大小/mtime、指令哈希、输出大小/mtime
+    都与当前一致时视为最新
+
+    :return: (待转换 [(输入, 输出, 输出戳参数)], 已是最新 [(输入, 输出)])
+    """
+    stats = await asyncio.to_thread(_stat_pairs, pairs)
+    outputs = [ouf for _, ouf in pairs]
+    stamps = {}
+    async with AsyncSessionLocal() as session:
+        for i in range(0, len(outputs), BATCH_SIZE):
+            result = await session.execute(
+                select(OutputStamp).where(
+                    OutputStamp.output.in_(outputs[i : i + BATCH_SIZE])
+                )
+            )
+            stamps.update({s.output: s for s in result.scalars().all()})
+    digest = cmd_hash(template)
+    todo, skipped = [], []
+    for inf, ouf in pairs:
+        in_stat, out_stat, stamp = stats[inf], stats[ouf], stamps.get(ouf)
+        if (
+            in_stat
+            and out_stat
+            and stamp
+            and out_stat[1] >= in_stat[1]
+            and stamp.input == inf
+            and (stamp.input_size, stamp.input_mtime) == in_stat
+            and (stamp.output_size, stamp.output_mtime) == out_stat
+            and stamp.cmd_hash == digest
+        ):
+            skipped.append((inf, ouf))
+            continue
+        stamp_args = {"input": inf, "cmd_hash": digest}
+        if in_stat:
+            stamp_args.update(input_size=in_stat[0], input_mtime=in_stat[1])
+        todo.append((inf, ouf, stamp_args))
+    return todo, skipped
+
+
+async def record_stamp(job: Job):
+    """任务结束回调：成功的增量转换任务写入输出戳"""
+    stamp = job.payload.get("stamp")
+    if job.state != "done" or not stamp or "input_size" not in stamp:
+        return
+    out_stat = await asyncio.to_thread(_stat, job.output)
+    if out_stat is None:
+        return
+    values = dict(
+        stamp, output=job.output, output_size=out_stat[0], output_mtime=out_stat[1]
+    )
+    stmt = insert(OutputStamp).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[OutputStamp.output],
+        set_={k: v for k, v in values.items() if k != "output"},
+    )
+    async with AsyncSessionLocal() as session:
+        await session.execute(stmt)
+        await session.commit()
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import os
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+
+from for_ffmpeg.api.models import JobRecord
+from for_ffmpeg.db import AsyncSessionLocal
+from for_ffmpeg.engine import kill_orphan
+from for_ffmpeg.merge import merge_job, submit_tree_merge
+from for_ffmpeg.scheduler import Job, JobScheduler, SchedulerFullError, temp_pairs
+from for_ffmpeg.segment import submit_segmented
+
+# 需要在启动时恢复的状态（暂停的任务恢复后仍保持暂停）
+UNFINISHED_STATES = ("queued", "running", "paused")
+
+
+class JobStore:
+    """任务持久化：所有写入串行执行，每次写入时取任务的最新状态"""
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+
+    async def save(self, jobs: List[Job]):
+        async with self._lock:
+            records = [job.record() for job in jobs]
+            stmt = insert(JobRecord)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[JobRecord.id],
+                set_={
+                    c: stmt.excluded[c]
+                    for c in records[0]
+                    if c not in ("id", "created_at")
+                },
+            )
+            try:
+                async with AsyncSessionLocal() as session:
+                    await session.execute(stmt, records)
+                    await session.commit()
+            except Exception as e:
+                print(f"保存任务状态失败: {e}")
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        async with AsyncSessionLocal() as session:
+            record = await session.get(JobRecord, job_id)
+        if record is None:
+            return None
+        return {c.name: getattr(record, c.name) for c in JobRecord.__table__.columns}
+
+    async def load_unfinished(self) -> List[JobRecord]:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(JobRecord)
+                .where(JobRecord.state.in_(UNFINISHED_STATES))
+                .order_by(JobRecord.created_at)
+            )
+            return list(result.scalars().all())
+
+
+def restore_job(record: JobRecord) -> Job:
+    """根据持久化记录重建任务"""
+    payload = json.loads(record.payload or "{}")
+    argv = payload.pop("argv", None) or [record.command]
+    priority = payload.pop("priority", "normal")
+    batch = payload.pop("batch", None)
+    if record.kind == "merge":
+        job = merge_job(argv, record.output, job_id=record.id, **payload)
+    else:
+        job = Job(
+            argv,
+            kind=record.kind,
+            output=record.output,
+            payload=payload,
+            job_id=record.id,
+        )
+    job.priority, job.batch = priority, batch
+    if record.state == "paused":
+        job.state = "paused"
+    return job
+
+
+def discard_partial_outputs(job: Job):
+    """
+    删除运行中断时留下的不完整输出（直接写入正式输出的任务，如旧版本提交的任务），
+    否则重新执行时 ffmpeg 会拒绝覆盖
+    """
+    if temp_pairs(job):
+        return
+    for output in job.payload.get("outputs") or [job.output]:
+        if output and os.path.isfile(output):
+            try:
+                os.remove(output)
+            except OSError as e:
+                print(f"删除不完整的输出失败[{job.id}]: {output}, {e}")
+
+
+async def resume_jobs(scheduler: JobScheduler, store: JobStore):
+    """恢复上次未完成的任务（已完成的不再执行），运行中断的任务重新执行"""
+    records = await store.load_unfinished()
+    resumed = 0
+    for record in records:
+        try:
+            if record.kind == "segment":
+                payload = json.loads(record.payload)
+                payload.pop("argv", None)
+                job = submit_segmented(job_id=record.id, **payload)
+                if record.state == "paused":
+                    scheduler.pause(job)
+            elif record.kind == "merge-tree":
+                payload = json.loads(record.payload)
+                payload.pop("argv", None)
+                job = submit_tree_merge(job_id=record.id, **payload)
+                if record.state == "paused":
+                    scheduler.pause(job)
+            else:
+                job = restore_job(record)
+                if record.state == "running":
+                    if record.pid and await asyncio.to_thread(
+                        kill_orphan, record.pid, job.argv[0], record.started_at
+                    ):
+                        print(f"已结束任务[{record.id}]遗留的进程 {record.pid}")
+                    await asyncio.to_thread(discard_partial_outputs, job)
+                scheduler.submit(job)
+            resumed += 1
+        except SchedulerFullError:
+            print(f"任务队列已满，剩余 {len(records) - resumed} 个任务待下次启动恢复")
+            break
+        except Exception as e:
+            print(f"恢复任务失败[{record.id}]: {e}")
+            job = Job([record.command], kind=record.kind, job_id=record.id)
+            job.state, job.error = "failed", f"恢复任务失败: {e}"
+            await store.save([job])
+    if records:
+        print(f"已恢复 {resumed} 个未完成的任务")
@@ -8,13 +8,33 @@ from fastapi.responses import FileResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 
 from for_ffmpeg.api import routers
-from for_ffmpeg.db import init_db
+from for_ffmpeg.api.conf import load_conf_dict
+from for_ffmpeg.cache import load_caches
+from for_ffmpeg.db import etag_headers, init_db, not_modified
+from for_ffmpeg.history import record_history
+from for_ffmpeg.incremental import record_stamp
+from for_ffmpeg.jobstore import JobStore, resume_jobs
+from for_ffmpeg.resources import ResourceGovernor
+from for_ffmpeg.scheduler import scheduler
+from for_ffmpeg.watcher import watcher
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
+    await load_caches()
+    conf = await load_conf_dict()
+    await scheduler.start(conf)
+    ResourceGovernor(scheduler, conf).start()
+    scheduler.store = JobStore()
+    scheduler.add_listener(record_stamp)
+    scheduler.add_listener(record_history)
+    await resume_jobs(scheduler, scheduler.store)
+    await watcher.start(conf)
     yield
+    # 先停止监视：其任务属于当前事件循环，留到下次启动时才取消会报 Event loop is closed
+    await watcher.stop()
+    await scheduler.stop()
 
 
 # 创建 FastAPI 应用
@@ -49,11 +69,21 @@ if isProd():
         name="static",
     )
 
+    def index_response(request: Request):
+        """index.html 以文件大小与修改时间作为 ETag，未变化时返回 304"""
+        path = get_resource_path("dist/index.html")
+        st = os.stat(path)
+        etag = f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+        return FileResponse(path, headers=etag_headers(etag))
+
     @app.get("/{full_path:path}")
     async def catch_all(request: Request, full_path: str):
         # 排除API和静态文件请求
         if not full_path.startswith(("api/", "static/")):
-            return FileResponse(get_resource_path("dist/index.html"))
+            return index_response(request)
         else:
             return JSONResponse(status_code=404, content={"detail": "Not Found X"})
 
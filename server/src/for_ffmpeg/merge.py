@@ -0,0 +1,240 @@
+import asyncio
+import codecs
+import os
+import tempfile
+from functools import partial
+from typing import Dict, List, Optional
+
+from for_ffmpeg.engine import build_argv
+from for_ffmpeg.scheduler import Job, scheduler
+
+# 可直接流复制拼接时使用的指令模板
+COPY_CONCAT_TEMPLATE = 'ffmpeg -f concat -safe 0 -i "FILE_LIST_TEXT" -c copy "OUT_PUT"'
+# 文件数超过该值时分组并行合并为中间文件，再合并中间文件
+MERGE_GROUP_SIZE = 200
+
+# 各类型流需要一致的编码参数
+STREAM_KEYS = {
+    "video": ("codec_name", "profile", "width", "height", "pix_fmt", "r_frame_rate"),
+    "audio": ("codec_name", "profile", "sample_rate", "channels", "channel_layout"),
+}
+DEFAULT_KEYS = ("codec_name",)
+
+
+def _layout(info: dict) -> List[tuple]:
+    layout = []
+    for s in info.get("streams", []):
+        keys = STREAM_KEYS.get(s.get("codec_type"), DEFAULT_KEYS)
+        layout.append((s.get("codec_type"),) + tuple(s.get(k) for k in keys))
+    return layout
+
+
+def _ext(path: str) -> str:
+    return os.path.splitext(path)[1].lower()
+
+
+def analyze_concat(
+    files: List[str], infos: Dict[str, dict], output: Optional[str] = None
+) -> dict:
+    """
+    判断输入文件能否直接 -c copy 拼接
+
+    :param infos: probe_files 的结果
+    :return: {"copy": 是否可以流复制, "reason": 不可以时的原因}
+    """
+    if not files:
+        return {"copy": False, "reason": "文件列表为空"}
+    first = files[0].replace("\\", "/")
+    exts = {_ext(f) for f in files}
+    if len(exts) > 1:
+        return {"copy": False, "reason": f"输入文件格式不一致：{sorted(exts)}"}
+    if output and _ext(output) not in exts:
+        return {"copy": False, "reason": f"输出格式 {_ext(output)} 与输入不同"}
+    base = None
+    for path in files:
+        path = path.replace("\\", "/")
+        info = infos.get(path) or {"error": "未探测"}
+        if "error" in info:
+            return {"copy": False, "reason": f"{path} 探测失败：{info['error']}"}
+        layout = _layout(info)
+        if not layout:
+            return {"copy": False, "reason": f"{path} 没有可用的媒体流"}
+        if base is None:
+            base = layout
+        elif layout != base:
+            return {
+                "copy": False,
+                "reason": f"{path} 的流参数与 {first} 不一致：{layout} != {base}",
+            }
+    return {"copy": True, "reason": None}
+
+
+def concat_entry(path: str) -> str:
+    """filelist 中的一行：路径格式为正斜杠，单引号转义为 '\\''"""
+    if not path or any(c in path for c in "\r\n\0"):
+        raise ValueError(f"文件路径无效：{path!r}")
+    adjusted_path = path.replace("\\", "/").replace("'", "'\\''")
+    return f"file '{adjusted_path}'\n"
+
+
+def write_filelist(files: List[str], filelist_path: str):
+    """校验输入文件后生成 filelist 文件"""
+    missing = [path for path in files if not os.path.isfile(path)]
+    if missing:
+        raise FileNotFoundError(f"{len(missing)} 个输入文件不存在：{missing[:5]}")
+    lines = [concat_entry(path) for path in files]
+    with codecs.open(filelist_path, "w", encoding="utf-8") as f:
+        f.writelines(lines)
+
+
+def new_filelist() -> str:
+    """每个合并任务独立的临时 filelist 文件"""
+    fd, path = tempfile.mkstemp(prefix="ffmpeg-filelist-", suffix=".txt")
+    os.close(fd)
+    return path.replace("\\", "/")
+
+
+def merge_job(
+    argv: List[str],
+    output: str,
+    files: List[str],
+    filelist: str,
+    job_id: Optional[str] = None,
+    priority: str = "normal",
+    temp_output: Optional[str] = None,
+    template: Optional[str] = None,
+    estimated_size: int = 0,
+) -> Job:
+    """
+    合并任务：执行前生成 filelist，结束后删除
+
+    :param temp_output: 实际写入的临时输出，成功后原子重命名为 output
+    """
+    payload = {"files": files, "filelist": filelist}
+    if temp_output:
+        payload["temp_output"] = temp_output
+    if template:
+        payload["template"] = template
+    if estimated_size:
+        payload["estimated_size"] = estimated_size
+    return Job(
+        argv,
+        kind="merge",
+        output=output,
+        prepare=lambda: write_filelist(files, filelist),
+        cleanup=lambda: _remove_all([filelist]),
+        payload=payload,
+        job_id=job_id,
+        priority=priority,
+    )
+
+
+def _concat_job(template: str, files: List[str], output: str, filelist: str) -> Job:
+    return Job(
+        build_argv(template, {"FILE_LIST_TEXT": filelist, "OUT_PUT": output}),
+        kind="concat",
+        output=output,
+        prepare=lambda: write_filelist(files, filelist),
+        persist=False,
+    )
+
+
+def submit_tree_merge(
+    files: List[str],
+    output: str,
+    template: str,
+    group_size: int = MERGE_GROUP_SIZE,
+    job_id: Optional[str] = None,
+    priority: str = "normal",
+    batch: Optional[str] = None,
+) -> Job:
+    """提交分层合并：每 group_size 个文件一组并行合并为中间文件，逐层合并至最终输出"""
+    job = Job(
+        build_argv(template, {"OUT_PUT": output}),
+        kind="merge-tree",
+        output=output,
+        payload={
+            "files": files,
+            "output": output,
+            "template": template,
+            "group_size": group_size,
+        },
+        job_id=job_id,
+        priority=priority,
+        batch=batch,
+    )
+    scheduler.track(job)
+    scheduler.mark_running(job)
+    job.task = scheduler.spawn(run_tree_merge(job, files, output, template, group_size))
+    return job
+
+
+async def run_tree_merge(
+    job: Job, files: List[str], output: str, template: str, group_size: int
+):
+    # 中间文件放在输出目录下，保证与输出在同一磁盘
+    await scheduler.orchestrate(
+        job,
+        partial(_merge_levels, job, files, output, template, group_size),
+        "分层合并",
+        ".merge-",
+        os.path.dirname(output) or None,
+    )
+
+
+async def _merge_levels(
+    job: Job,
+    files: List[str],
+    output: str,
+    template: str,
+    group_size: int,
+    workdir: str,
+):
+    ext = os.path.splitext(output)[1]
+    # 第一层使用所选指令（流复制或重新编码），之后各层的输入格式一致，直接流复制
+    current, level_template, level = list(files), template, 0
+    while len(current) > group_size:
+        level += 1
+        name = f"level-{level}"
+        groups = [
+            current[i : i + group_size] for i in range(0, len(current), group_size)
+        ]
+        prefix = f"{workdir}/l{level}_"
+        jobs = [
+            _concat_job(
+                level_template,
+                group,
+                f"{prefix}{i:05d}{ext}",
+                f"{prefix}{i:05d}.txt",
+            )
+            for i, group in enumerate(groups)
+        ]
+        job.set_stage(name, 0, len(jobs))
+        ok = await scheduler.run_all(
+            scheduler.adopt(job, jobs),
+            lambda done, total: job.set_stage(name, done, total),
+        )
+        if not ok:
+            failed = [j for j in jobs if j.state != "done"]
+            raise RuntimeError(f"{name} 有 {len(failed)} 组合并失败：{failed[0].error}")
+        if level > 1:
+            # 上一层的中间文件已不再需要
+            await asyncio.to_thread(_remove_all, current)
+        current = [j.output for j in jobs]
+        level_template = COPY_CONCAT_TEMPLATE
+
+    job.set_stage("concat")
+    # 先写到临时目录中，成功后原子重命名为最终输出
+    target = f"{workdir}/output{ext}"
+    concat = _concat_job(level_template, current, target, f"{workdir}/filelist.txt")
+    if not await scheduler.run_all(scheduler.adopt(job, [concat])):
+        raise RuntimeError(f"合并失败：{concat.error}")
+    await asyncio.to_thread(os.replace, target, output)
+
+
+def _remove_all(paths: List[str]):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            continue
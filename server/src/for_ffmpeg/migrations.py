@@ -0,0 +1,68 @@
+import time
+from typing import Callable, Dict, List, Tuple
+
+from sqlalchemy import Connection, func, insert, select
+
+from for_ffmpeg.api.models import SchemaVersion
+
+# 迁移步骤只针对已有的表（新增的表由 create_all 创建），因此需兼容表不存在的情况；
+# 步骤中使用固定的 SQL 而不是当前的模型定义，模型之后的变化不影响已有的步骤
+
+
+def _columns(conn: Connection, table: str) -> Dict[str, str]:
+    """表的列名 -> 声明类型，表不存在时为空"""
+    rows = conn.exec_driver_sql(f"PRAGMA table_info({table})").all()
+    return {row[1]: row[2].upper() for row in rows}
+
+
+def _conf_param_text_key(conn: Connection):
+    # 早期内置的 data.db 中 conf_param.pkey 为 INTEGER，字符串键无法保存
+    if _columns(conn, "conf_param").get("pkey") != "INTEGER":
+        return
+    conn.exec_driver_sql("ALTER TABLE conf_param RENAME TO conf_param_old")
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_conf_param_pkey")
+    conn.exec_driver_sql(
+        "CREATE TABLE conf_param (pkey VARCHAR NOT NULL, pvalue VARCHAR, "
+        "PRIMARY KEY (pkey))"
+    )
+    conn.exec_driver_sql("CREATE INDEX ix_conf_param_pkey ON conf_param (pkey)")
+    conn.exec_driver_sql(
+        "INSERT INTO conf_param (pkey, pvalue) "
+        "SELECT CAST(pkey AS TEXT), pvalue FROM conf_param_old"
+    )
+    conn.exec_driver_sql("DROP TABLE conf_param_old")
+
+
+def _job_record_pid(conn: Connection):
+    # 记录 ffmpeg 进程号，异常退出后重启时结束遗留的进程
+    columns = _columns(conn, "job_record")
+    if not columns or "pid" in columns:
+        return
+    conn.exec_driver_sql("ALTER TABLE job_record ADD COLUMN pid INTEGER")
+
+
+# 按版本号顺序执行，已发布的步骤不可修改，只能追加
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "conf_param 主键改为字符串", _conf_param_text_key),
+    (2, "job_record 增加进程号", _job_record_pid),
+]
+
+
+def migrate(conn: Connection) -> int:
+    """执行未执行过的迁移，返回执行的步骤数"""
+    SchemaVersion.__table__.create(conn, checkfirst=True)
+    current = conn.execute(select(func.max(SchemaVersion.version))).scalar() or 0
+    pending = [m for m in MIGRATIONS if m[0] > current]
+    if not pending:
+        return 0
+    # sqlite3 驱动不会在 DDL 前自动开启事务，显式开启，保证全部步骤要么都生效要么都不生效
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+    for version, name, step in pending:
+        print(f"数据库迁移 {version}：{name}")
+        step(conn)
+        conn.execute(
+            insert(SchemaVersion).values(
+                version=version, name=name, applied_at=time.time()
+            )
+        )
+    return len(pending)
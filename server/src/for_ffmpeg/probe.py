@@ -0,0 +1,162 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from for_ffmpeg.api.models import MediaProbe
+
+# ffprobe 并发进程数上限
+PROBE_WORKERS = min(16, (os.cpu_count() or 1) * 2)
+# 单个文件探测超时（秒）
+PROBE_TIMEOUT = 60
+# 查询缓存时每批的路径数
+BATCH_SIZE = 500
+
+_pool = ThreadPoolExecutor(max_workers=PROBE_WORKERS, thread_name_prefix="ffprobe")
+
+
+def _to_number(value):
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def summarize(raw: dict) -> dict:
+    """提炼 ffprobe JSON：时长、码率、各流编码参数，以及首个音视频流的常用字段"""
+    fmt = raw.get("format", {})
+    streams = []
+    for s in raw.get("streams", []):
+        streams.append(
+            {
+                "index": s.get("index"),
+                "codec_type": s.get("codec_type"),
+                "codec_name": s.get("codec_name"),
+                "profile": s.get("profile"),
+                "width": s.get("width"),
+                "height": s.get("height"),
+                "pix_fmt": s.get("pix_fmt"),
+                "r_frame_rate": s.get("r_frame_rate"),
+                "time_base": s.get("time_base"),
+                "sample_rate": _to_number(s.get("sample_rate")),
+                "channels": s.get("channels"),
+                "channel_layout": s.get("channel_layout"),
+                "bit_rate": _to_number(s.get("bit_rate")),
+            }
+        )
+    video = next((s for s in streams if s["codec_type"] == "video"), {})
+    audio = next((s for s in streams if s["codec_type"] == "audio"), {})
+    return {
+        "format": fmt.get("format_name"),
+        "duration": _to_number(fmt.get("duration")),
+        "bit_rate": _to_number(fmt.get("bit_rate")),
+        "size": _to_number(fmt.get("size")),
+        "video_codec": video.get("codec_name"),
+        "width": video.get("width"),
+        "height": video.get("height"),
+        "audio_codec": audio.get("codec_name"),
+        "sample_rate": audio.get("sample_rate"),
+        "channels": audio.get("channels"),
+        "streams": streams,
+    }
+
+
+def probe_file(path: str) -> dict:
+    """调用 ffprobe 读取单个文件的媒体信息"""
+    creationflags = 0
+    if sys.platform == "win32":
+        creationflags = subprocess.CREATE_NO_WINDOW
+    result = subprocess.run(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-print_format",
+            "json",
+            "-show_format",
+            "-show_streams",
+            path,
+        ],
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        timeout=PROBE_TIMEOUT,
+        creationflags=creationflags,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(
+            result.stderr.strip() or f"ffprobe 退出码 {result.returncode}"
+        )
+    return summarize(json.loads(result.stdout))
+
+
+def _stat_all(paths: List[str]) -> Dict[str, Optional[tuple]]:
+    stats = {}
+    for path in paths:
+        try:
+            st = os.stat(path)
+            stats[path] = (st.st_size, st.st_mtime)
+        except OSError:
+            stats[path] = None
+    return stats
+
+
+async def probe_files(
+    session: AsyncSession, paths: List[str], cached_only: bool = False
+) -> Dict[str, dict]:
+    """
+    批量探测，(path, size, mtime) 命中缓存的直接返回，其余并发调用 ffprobe
+
+    :param cached_only: 只返回命中缓存的结果，不调用 ffprobe
+    """
+    paths = list(dict.fromkeys(p.replace("\\", "/") for p in paths))
+    stats = await asyncio.to_thread(_stat_all, paths)
+    results: Dict[str, dict] = {}
+    for path, stat in stats.items():
+        if stat is None:
+            results[path] = {"error": "文件不存在"}
+
+    existing = [p for p in paths if stats[p] is not None]
+    for i in range(0, len(existing), BATCH_SIZE):
+        rows = await session.execute(
+            select(MediaProbe).where(MediaProbe.path.in_(existing[i : i + BATCH_SIZE]))
+        )
+        for row in rows.scalars().all():
+            if (row.size, row.mtime) == stats[row.path]:
+                results[row.path] = json.loads(row.info)
+
+    misses = [p for p in existing if p not in results]
+    if not misses or cached_only:
+        return results
+    loop = asyncio.get_running_loop()
+    probed = await asyncio.gather(
+        *(loop.run_in_executor(_pool, probe_file, p) for p in misses),
+        return_exceptions=True,
+    )
+    fresh = []
+    for path, info in zip(misses, probed):
+        if isinstance(info, Exception):
+            results[path] = {"error": str(info)}
+            continue
+        results[path] = info
+        size, mtime = stats[path]
+        fresh.append(
+            MediaProbe(path=path, size=size, mtime=mtime, info=json.dumps(info))
+        )
+    if fresh:
+        # 同一路径只保留最新一条缓存
+        stale = [m.path for m in fresh]
+        for i in range(0, len(stale), BATCH_SIZE):
+            await session.execute(
+                delete(MediaProbe).where(MediaProbe.path.in_(stale[i : i + BATCH_SIZE]))
+            )
+        session.add_all(fresh)
+        await session.commit()
+    return results
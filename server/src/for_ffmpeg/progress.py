@@ -0,0 +1,43 @@
+from typing import Optional
+
+
+def _to_number(value: str):
+    try:
+        return float(value) if "." in value else int(value)
+    except ValueError:
+        return None
+
+
+class ProgressParser:
+    """增量解析 ffmpeg -progress 输出（key=value 行，以 progress=... 结束一个块）"""
+
+    def __init__(self):
+        self._block = {}
+        self.latest = {}
+
+    def feed(self, line: str) -> Optional[dict]:
+        """输入一行，块结束时返回最新的进度快照"""
+        key, sep, value = line.strip().partition("=")
+        if not sep:
+            return None
+        self._block[key] = value.strip()
+        if key != "progress":
+            return None
+        block, self._block = self._block, {}
+        self.latest = self._snapshot(block)
+        return self.latest
+
+    @staticmethod
+    def _snapshot(block: dict) -> dict:
+        out_time_us = _to_number(block.get("out_time_us", ""))
+        speed = block.get("speed", "").rstrip("x")
+        bitrate = block.get("bitrate", "").replace("kbits/s", "")
+        return {
+            "frame": _to_number(block.get("frame", "")),
+            "fps": _to_number(block.get("fps", "")),
+            "bitrate_kbps": _to_number(bitrate),
+            "total_size": _to_number(block.get("total_size", "")),
+            "out_time": out_time_us / 1_000_000 if out_time_us else None,
+            "speed": _to_number(speed),
+            "end": block.get("progress") == "end",
+        }
@@ -0,0 +1,201 @@
+import asyncio
+import os
+import re
+import shutil
+from typing import Dict, List, Optional, Tuple
+
+import psutil
+
+from for_ffmpeg.db import AsyncSessionLocal
+from for_ffmpeg.engine import compile_template
+from for_ffmpeg.probe import probe_files
+from for_ffmpeg.scheduler import Job, JobScheduler, conf_int
+
+MB = 1024 * 1024
+# 默认阈值，可通过配置参数 RES_MAX_CPU / RES_MAX_MEMORY（百分比）、
+# RES_MIN_FREE_DISK_MB、RES_CHECK_INTERVAL（秒）调整
+DEFAULT_MAX_CPU = 95
+DEFAULT_MAX_MEMORY = 90
+DEFAULT_MIN_FREE_DISK_MB = 1024
+DEFAULT_CHECK_INTERVAL = 5
+# 指定输出码率的参数
+BITRATE_OPTIONS = ("-b", "-b:v", "-b:a", "-ab", "-vb")
+_BITRATE = re.compile(r"^(\d+(?:\.\d+)?)([kKmM]?)$")
+# 按码率估算时最多探测的输入数，其余输入按样本的 时长/大小 比例推算时长
+ESTIMATE_PROBE_LIMIT = 20
+
+
+def _existing_dir(path: str) -> str:
+    """path 所在的、已存在的最近一级目录"""
+    folder = os.path.dirname(os.path.abspath(path))
+    while not os.path.isdir(folder):
+        parent = os.path.dirname(folder)
+        if parent == folder:
+            break
+        folder = parent
+    return folder
+
+
+def disk_free(path: str) -> Optional[int]:
+    """path 所在磁盘的剩余空间（字节）"""
+    try:
+        return shutil.disk_usage(_existing_dir(path)).free
+    except OSError:
+        return None
+
+
+def template_bitrate(template: str) -> Optional[float]:
+    """指令模板中指定的输出码率之和（bit/s），未指定时返回 None"""
+    argv = compile_template(template)
+    total = None
+    for option, value in zip(argv, argv[1:]):
+        match = _BITRATE.match(value) if option in BITRATE_OPTIONS else None
+        if match:
+            scale = {"": 1, "k": 1e3, "m": 1e6}[match.group(2).lower()]
+            total = (total or 0) + float(match.group(1)) * scale
+    return total
+
+
+def _sizes(paths: List[str]) -> Dict[str, int]:
+    sizes = {}
+    for path in paths:
+        try:
+            sizes[path] = os.path.getsize(path)
+        except OSError:
+            sizes[path] = 0
+    return sizes
+
+
+async def estimate_outputs(
+    pairs: List[Tuple[str, str]], template: Optional[str] = None
+) -> Dict[str, int]:
+    """
+    估算各输出文件大小（字节）
+
+    指令模板指定了码率时按 时长 * 码率 估算，否则按输入码率估算（即输入文件大小）；
+    只探测均匀抽取的少量输入，提交大批量任务时不会逐个调用 ffprobe
+    """
+    sizes = await asyncio.to_thread(_sizes, [inf for inf, _ in pairs])
+    bitrate = template_bitrate(template) if template else None
+    durations: Dict[str, float] = {}
+    ratio = None
+    if bitrate:
+        inputs = list(dict.fromkeys(inf for inf, _ in pairs))
+        step = max(1, len(inputs) // ESTIMATE_PROBE_LIMIT)
+        sample = inputs[::step][:ESTIMATE_PROBE_LIMIT]
+        async with AsyncSessionLocal() as session:
+            infos = await probe_files(session, sample)
+        for path in sample:
+            duration = infos.get(path, {}).get("duration")
+            if duration:
+                durations[path] = duration
+        sampled = sum(sizes[path] for path in durations)
+        if sampled:
+            ratio = sum(durations.values()) / sampled
+    estimates: Dict[str, int] = {}
+    for inf, ouf in pairs:
+        duration = durations.get(inf) or (sizes[inf] * ratio if ratio else None)
+        size = int(duration * bitrate / 8) if duration else sizes[inf]
+        # 多个输入写入同一输出（合并）时累加
+        estimates[ouf] = estimates.get(ouf, 0) + size
+    return estimates
+
+
+def _check_space(estimates: Dict[str, int], reserve: int) -> Optional[str]:
+    need: Dict[int, int] = {}
+    folders: Dict[int, str] = {}
+    for output, size in estimates.items():
+        folder = _existing_dir(output)
+        try:
+            dev = os.stat(folder).st_dev
+        except OSError:
+            continue
+        need[dev] = need.get(dev, 0) + size
+        folders.setdefault(dev, folder)
+    for dev, size in need.items():
+        free = disk_free(folders[dev]) or 0
+        if size + reserve > free:
+            return (
+                f"{folders[dev]} 所在磁盘空间不足：预计需要 {size // MB} MB，"
+                f"剩余 {free // MB} MB（保留 {reserve // MB} MB）"
+            )
+    return None
+
+
+class ResourceGovernor:
+    """根据 CPU、内存与磁盘空间限制任务并发"""
+
+    def __init__(self, scheduler: JobScheduler, conf: Optional[Dict[str, str]] = None):
+        conf = conf or {}
+        self.scheduler = scheduler
+        self.max_cpu = conf_int(conf.get("RES_MAX_CPU"), DEFAULT_MAX_CPU)
+        self.max_memory = conf_int(conf.get("RES_MAX_MEMORY"), DEFAULT_MAX_MEMORY)
+        self.reserve = (
+            conf_int(conf.get("RES_MIN_FREE_DISK_MB"), DEFAULT_MIN_FREE_DISK_MB) * MB
+        )
+        self.interval = conf_int(conf.get("RES_CHECK_INTERVAL"), DEFAULT_CHECK_INTERVAL)
+        # 由 monitor 每隔 interval 秒采样一次，admit 只读取最近一次的结果
+        self.cpu = 0.0
+        # 首次调用只作为基准，之后返回两次调用之间的平均占用
+        psutil.cpu_percent(interval=None)
+
+    def start(self):
+        self.scheduler.governor = self
+        self.scheduler.spawn(self.monitor())
+
+    async def check_space(self, estimates: Dict[str, int]) -> Optional[str]:
+        """提交前检查：各磁盘剩余空间能否容纳预计输出，不能时返回原因"""
+        return await asyncio.to_thread(_check_space, estimates, self.reserve)
+
+    def _saturated(self) -> Optional[str]:
+        if self.cpu >= self.max_cpu:
+            return f"CPU 占用 {self.cpu:.0f}%"
+        memory = psutil.virtual_memory().percent
+        if memory >= self.max_memory:
+            return f"内存占用 {memory:.0f}%"
+        return None
+
+    def _disk_short(self, job: Job) -> Optional[str]:
+        if not job.output:
+            return None
+        free = disk_free(job.output)
+        need = self.reserve + job.payload.get("estimated_size", 0)
+        if free is not None and free < need:
+            return (
+                f"{_existing_dir(job.output)} 所在磁盘空间不足（剩余 {free // MB} MB）"
+            )
+        return None
+
+    async def admit(self, job: Job):
+        """
+        启动任务前等待资源：磁盘空间不足时不启动；
+        机器繁忙时不再启动新任务（至少保留一个运行中的任务）
+        """
+        while job.state == "queued":
+            reason = self._disk_short(job)
+            if reason is None and self.scheduler.running():
+                reason = self._saturated()
+            if reason is None:
+                break
+            if self.scheduler.throttled != reason:
+                print(f"任务限流：{reason}")
+            self.scheduler.throttled = reason
+            await asyncio.sleep(self.interval)
+        self.scheduler.throttled = None
+
+    async def monitor(self):
+        """
+        定时采样 CPU 占用（两次采样间的平均值）；
+        运行中的任务所在磁盘即将写满时自动暂停，释放空间后手动恢复
+        """
+        while True:
+            await asyncio.sleep(self.interval)
+            self.cpu = psutil.cpu_percent(interval=None)
+            for job in self.scheduler.running():
+                if not job.output or job.pid is None:
+                    continue
+                free = disk_free(job.output)
+                if free is not None and free < self.reserve:
+                    self.scheduler.pause(job)
+                    job.error = f"磁盘剩余 {free // MB} MB，已自动暂停"
+                    print(f"任务[{job.id}] {job.error}")
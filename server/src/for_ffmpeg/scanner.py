@@ -0,0 +1,105 @@
+import json
+import os
+from itertools import islice
+from typing import Iterator, List, Optional
+
+# NDJSON 流式输出时每次写出的条目数
+STREAM_CHUNK_SIZE = 500
+
+
+def iter_entries(
+    path: str, recursive: bool = True, after: Optional[str] = None
+) -> Iterator[dict]:
+    """
+    基于 os.scandir 遍历文件，直接从 DirEntry 取 size/mtime
+
+    目录内按名称排序，先文件后子目录深度优先遍历，顺序是确定的；
+    after 为之前返回的某个文件，从它之后继续遍历，不再重新遍历它之前的目录
+    """
+    path = path.replace("\\", "/")
+    # (目录, 只返回名称在此之后的文件, 只进入名称在此之后的子目录且不返回文件)
+    stack = _resume_stack(path, after, recursive) if after else [(path, None, None)]
+    while stack:
+        current, file_after, dir_after = stack.pop()
+        files, subdirs = [], []
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry)
+                        elif entry.is_file():
+                            files.append(entry)
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"扫描目录失败: {current}, {e}")
+            continue
+        if dir_after is None:
+            for entry in sorted(files, key=lambda e: e.name):
+                if file_after is not None and entry.name <= file_after:
+                    continue
+                try:
+                    # Windows 下 DirEntry.stat() 使用遍历时缓存的信息，无额外系统调用
+                    st = entry.stat()
+                except OSError:
+                    continue
+                yield {
+                    "path": entry.path.replace("\\", "/"),
+                    "size": st.st_size,
+                    "mtime": st.st_mtime,
+                }
+        if recursive:
+            names = sorted(e.name for e in subdirs)
+            if dir_after is not None:
+                names = [name for name in names if name > dir_after]
+            # 逆序入栈，保证按名称顺序深度优先遍历
+            stack.extend(
+                (f"{current.rstrip('/')}/{name}", None, None)
+                for name in reversed(names)
+            )
+
+
+def _resume_stack(path: str, after: str, recursive: bool) -> List[tuple]:
+    """after 之后尚未遍历的部分：所在目录的剩余文件与子目录、各上级目录中排在后面的子目录"""
+    after = after.replace("\\", "/")
+    try:
+        rel = os.path.relpath(os.path.dirname(after), path).replace("\\", "/")
+    except ValueError:
+        rel = ".."
+    parts = [] if rel == "." else rel.split("/")
+    if ".." in parts or (parts and not recursive):
+        raise ValueError(f"cursor 不在扫描目录内：{after}")
+    stack, current = [], path
+    for part in parts:
+        stack.append((current, None, part))
+        current = f"{current.rstrip('/')}/{part}"
+    stack.append((current, os.path.basename(after), None))
+    return stack
+
+
+def scan_page(
+    path: str,
+    recursive: bool,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> dict:
+    """
+    分页扫描，cursor 为上一页最后一个文件的路径；
+    从该文件之后继续遍历，遍历到当前页为止即停止，翻页不会重新遍历之前的目录
+    """
+    entries: List[dict] = list(islice(iter_entries(path, recursive, cursor), limit))
+    next_cursor = None
+    if limit is not None and len(entries) == limit:
+        next_cursor = entries[-1]["path"]
+    return {"entries": entries, "next_cursor": next_cursor}
+
+
+def iter_ndjson(path: str, recursive: bool) -> Iterator[str]:
+    """按块输出 NDJSON，每行一个文件条目"""
+    entries = iter_entries(path, recursive)
+    while True:
+        chunk = list(islice(entries, STREAM_CHUNK_SIZE))
+        if not chunk:
+            break
+        yield "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in chunk)
@@ -0,0 +1,570 @@
+import asyncio
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Literal, Optional, Tuple
+
+from for_ffmpeg.engine import format_argv, run_argv, signal_tree
+
+# 默认每个任务占用的线程数，工作线程数 = CPU核数 // 每任务线程数
+DEFAULT_THREADS_PER_JOB = 2
+# 默认队列容量，超出时拒绝提交（背压）
+DEFAULT_QUEUE_SIZE = 1000
+# 默认在内存中保留的已结束任务数，更早的只能从数据库查询
+DEFAULT_KEEP_FINISHED = 500
+# 运行中任务超过该秒数没有进度更新视为卡住
+STALL_SECONDS = 30
+# 优先级通道，数值越小越先执行（同一通道内先进先出）
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+Priority = Literal["high", "normal", "low"]
+# 已结束的状态
+FINAL_STATES = ("done", "failed", "cancelled")
+
+
+class SchedulerFullError(Exception):
+    """任务队列已满"""
+
+
+class Job:
+    def __init__(
+        self,
+        argv: List[str],
+        kind: str = "convert",
+        output: Optional[str] = None,
+        prepare: Optional[Callable[[], None]] = None,
+        cleanup: Optional[Callable[[], None]] = None,
+        payload: Optional[dict] = None,
+        persist: bool = True,
+        job_id: Optional[str] = None,
+        priority: str = "normal",
+        batch: Optional[str] = None,
+    ):
+        self.id = job_id or uuid.uuid4().hex
+        self.kind = kind
+        self.priority = priority if priority in PRIORITIES else "normal"
+        # 同一次提交的任务共用批次号，可整批取消/暂停/恢复
+        self.batch = batch
+        self.argv = list(argv)
+        self.command = format_argv(self.argv)
+        self.output = output
+        # 执行前的准备工作（如生成 filelist），在工作线程中执行
+        self.prepare = prepare
+        # 任务结束（含取消）后的清理工作（如删除临时 filelist），在工作线程中执行
+        self.cleanup = cleanup
+        # 重启后恢复任务所需的参数
+        self.payload = payload or {}
+        # 是否持久化到数据库（编排产生的子任务不持久化）
+        self.persist = persist
+        self.state = "queued"
+        self.exit_code = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.progress = {}
+        self.stderr_tail: List[str] = []
+        self.updated_at = self.created_at
+        # 运行中的进程号，用于结束/挂起整个进程树
+        self.pid: Optional[int] = None
+        # 已请求取消
+        self.cancelled = False
+        # 编排任务的协程及其产生的子任务（取消/暂停时一并处理）
+        self.task: Optional[asyncio.Task] = None
+        self.children: List["Job"] = []
+        # 任务结束（成功或失败）时置位，供编排任务等待
+        self.done = asyncio.Event()
+
+    def update_progress(self, progress: dict):
+        self.progress = progress
+        self.updated_at = time.time()
+
+    def set_stage(self, stage: str, done: int = 0, total: int = 0):
+        """编排任务的阶段进度"""
+        self.update_progress({"stage": stage, "done": done, "total": total})
+
+    @property
+    def stalled(self) -> bool:
+        idle = time.time() - self.updated_at
+        return self.state == "running" and idle > STALL_SECONDS
+
+    def record(self) -> dict:
+        """持久化字段"""
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "state": self.state,
+            "command": self.command,
+            "output": self.output,
+            "payload": json.dumps(
+                {
+                    **self.payload,
+                    "argv": self.argv,
+                    "priority": self.priority,
+                    "batch": self.batch,
+                },
+                ensure_ascii=False,
+            ),
+            "exit_code": self.exit_code,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "pid": self.pid,
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "priority": self.priority,
+            "batch": self.batch,
+            "command": self.command,
+            "output": self.output,
+            "state": self.state,
+            "exit_code": self.exit_code,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "updated_at": self.updated_at,
+            "progress": self.progress,
+            "stalled": self.stalled,
+            "stderr_tail": self.stderr_tail,
+        }
+
+
+def default_workers(threads_per_job: int = DEFAULT_THREADS_PER_JOB) -> int:
+    """根据CPU核数计算默认并发数"""
+    return max(1, (os.cpu_count() or 1) // max(1, threads_per_job))
+
+
+class JobScheduler:
+    """有界工作池 + 分优先级通道的任务调度器"""
+
+    def __init__(self):
+        self.jobs: Dict[str, Job] = {}
+        self.max_workers = default_workers()
+        self.queue_size = DEFAULT_QUEUE_SIZE
+        self.keep_finished = DEFAULT_KEEP_FINISHED
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._seq = itertools.count()
+        # 排队时被暂停的任务，出队后暂存于此，恢复时重新入队
+        self._held: Dict[str, Job] = {}
+        self._workers: List[asyncio.Task] = []
+        # 编排类任务（如分段转码）的协程，不占用工作协程
+        self._tasks: set = set()
+        # 任务持久化（JobStore），为 None 时只保存在内存中
+        self.store = None
+        self._saves: set = set()
+        self._listeners: List[Callable[[Job], Awaitable[None]]] = []
+        # 资源限流（ResourceGovernor），为 None 时不限流
+        self.governor = None
+        # 当前限流原因，None 表示未限流
+        self.throttled: Optional[str] = None
+
+    async def start(self, conf: Optional[Dict[str, str]] = None):
+        """
+        启动工作协程，conf 为配置参数
+        （JOB_WORKERS / JOB_THREADS / JOB_QUEUE_SIZE / JOB_KEEP_FINISHED）
+        """
+        conf = conf or {}
+        threads = conf_int(conf.get("JOB_THREADS"), DEFAULT_THREADS_PER_JOB)
+        self.max_workers = conf_int(conf.get("JOB_WORKERS"), default_workers(threads))
+        self.queue_size = conf_int(conf.get("JOB_QUEUE_SIZE"), DEFAULT_QUEUE_SIZE)
+        self.keep_finished = conf_int(
+            conf.get("JOB_KEEP_FINISHED"), DEFAULT_KEEP_FINISHED
+        )
+        # 容量由 submit_many 检查，恢复暂停的任务时不受限制
+        self._queue = asyncio.PriorityQueue()
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.max_workers)
+        ]
+        print(
+            f"任务调度器已启动，并发数：{self.max_workers}，队列容量：{self.queue_size}"
+        )
+
+    async def stop(self):
+        for worker in [*self._workers, *self._tasks]:
+            worker.cancel()
+        await asyncio.gather(*self._workers, *self._tasks, return_exceptions=True)
+        self._workers = []
+        # 等待状态写入完成，运行中的任务保持 running 状态，下次启动时恢复
+        await asyncio.gather(*self._saves, return_exceptions=True)
+
+    def persist(self, jobs: List[Job]):
+        """异步保存任务状态（写入时取最新状态，先后顺序不影响结果）"""
+        jobs = [job for job in jobs if job.persist]
+        if self.store is None or not jobs:
+            return
+        task = asyncio.create_task(self.store.save(jobs))
+        self._saves.add(task)
+        task.add_done_callback(self._saves.discard)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def summary(self) -> dict:
+        """汇总各状态任务数及运行中任务的总体速度"""
+        states = {}
+        running = []
+        for job in self.jobs.values():
+            states[job.state] = states.get(job.state, 0) + 1
+            if job.state == "running":
+                running.append(job)
+        return {
+            "workers": self.max_workers,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "states": states,
+            "fps": sum(j.progress.get("fps") or 0 for j in running),
+            "speed": sum(j.progress.get("speed") or 0 for j in running),
+            "stalled": [j.id for j in running if j.stalled],
+            "throttled": self.throttled,
+        }
+
+    def running(self) -> List[Job]:
+        """正在执行进程的任务（不含编排任务）"""
+        return [j for j in self.jobs.values() if j.state == "running" and not j.task]
+
+    def busy(self) -> bool:
+        """是否有正在执行或排队等待执行的任务"""
+        return bool(self.running()) or bool(self._queue and self._queue.qsize())
+
+    def track(self, job: Job) -> Job:
+        """登记不进入队列的任务（由编排协程自行维护状态）"""
+        self.jobs[job.id] = job
+        self.persist([job])
+        return job
+
+    def batch(self, batch_id: str) -> List[Job]:
+        return [job for job in self.jobs.values() if job.batch == batch_id]
+
+    def adopt(self, parent: Job, jobs: List[Job]) -> List[Job]:
+        """登记编排任务产生的子任务，继承优先级及暂停状态"""
+        for job in jobs:
+            job.priority = parent.priority
+            if parent.state == "paused":
+                job.state = "paused"
+        parent.children.extend(jobs)
+        return jobs
+
+    def spawn(self, coro) -> asyncio.Task:
+        """启动编排协程，保留引用直至结束"""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def run_all(
+        self,
+        jobs: List[Job],
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ) -> bool:
+        """
+        提交一组任务并等待全部结束，全部成功时返回 True
+
+        :param on_progress: 每结束一个任务时以 (已结束数, 总数) 回调
+        """
+        self.submit_many(jobs)
+        waiters = asyncio.as_completed([job.done.wait() for job in jobs])
+        for finished, waiter in enumerate(waiters, 1):
+            await waiter
+            if on_progress:
+                on_progress(finished, len(jobs))
+        return all(job.state == "done" for job in jobs)
+
+    async def orchestrate(
+        self,
+        job: Job,
+        body: Callable[[str], Awaitable[None]],
+        label: str,
+        prefix: str,
+        parent: Optional[str] = None,
+    ):
+        """
+        执行编排任务（分段转码、分层合并、基准测试）的公共流程
+
+        在 parent 下创建临时目录传给 body，body 正常返回即成功；
+        服务关闭时保持 running 状态，下次启动时重新执行；结束后删除临时目录
+        """
+        workdir = None
+        shutdown = False
+        try:
+            if parent:
+                await asyncio.to_thread(os.makedirs, parent, exist_ok=True)
+            workdir = Path(tempfile.mkdtemp(prefix=prefix, dir=parent)).as_posix()
+            await body(workdir)
+            job.state = "done"
+            job.exit_code = 0
+        except asyncio.CancelledError:
+            if not job.cancelled:
+                shutdown = True
+                raise
+            job.state = "cancelled"
+            job.error = "任务已取消"
+        except Exception as e:
+            job.state = "failed"
+            job.error = str(e)
+            print(f"{label}失败[{job.id}]: {e}")
+        finally:
+            if workdir:
+                shutil.rmtree(workdir, ignore_errors=True)
+            if not shutdown:
+                await self.finish(job)
+
+    def submit(self, job: Job) -> Job:
+        return self.submit_many([job])[0]
+
+    def submit_many(self, jobs: List[Job]) -> List[Job]:
+        """批量提交任务，队列剩余容量不足时整体拒绝"""
+        if self._queue is None:
+            raise RuntimeError("任务调度器未启动")
+        free = self.queue_size - self._queue.qsize()
+        if len(jobs) > free:
+            raise SchedulerFullError(
+                f"任务队列已满（剩余 {free}，需要 {len(jobs)}），请稍后再提交"
+            )
+        for job in jobs:
+            self.jobs[job.id] = job
+            self._enqueue(job)
+        self.persist(jobs)
+        return jobs
+
+    def _enqueue(self, job: Job):
+        self._queue.put_nowait((PRIORITIES[job.priority], next(self._seq), job))
+
+    def cancel(self, job: Job) -> bool:
+        """取消任务：排队中的直接结束，运行中的结束整个进程树"""
+        if job.state in FINAL_STATES:
+            return False
+        job.cancelled = True
+        for child in job.children:
+            self.cancel(child)
+        if job.task is not None:
+            # 编排协程自行标记状态并清理临时文件
+            job.task.cancel()
+        elif job.pid is not None:
+            signal_tree(job.pid, "kill")
+        elif job.state != "running":
+            # 还在排队（仍在队列中的由工作协程跳过）
+            self._held.pop(job.id, None)
+            job.state = "cancelled"
+            job.error = "任务已取消"
+            self.spawn(self.finish(job))
+        # 其余为正在执行 prepare，进程启动时立即结束
+        return True
+
+    def pause(self, job: Job) -> bool:
+        """暂停任务：排队中的暂不执行，运行中的挂起整个进程树"""
+        if job.state not in ("queued", "running"):
+            return False
+        if job.state == "running" and job.pid is None and job.task is None:
+            # 进程尚未启动
+            return False
+        for child in job.children:
+            self.pause(child)
+        if job.pid is not None:
+            signal_tree(job.pid, "suspend")
+        job.state = "paused"
+        job.updated_at = time.time()
+        self.persist([job])
+        return True
+
+    def resume(self, job: Job) -> bool:
+        """恢复暂停的任务"""
+        if job.state != "paused":
+            return False
+        for child in job.children:
+            self.resume(child)
+        if job.pid is not None or job.task is not None:
+            if job.pid is not None:
+                signal_tree(job.pid, "resume")
+            job.state = "running"
+        else:
+            job.state = "queued"
+            if self._held.pop(job.id, None) is not None:
+                self._enqueue(job)
+        job.error = None
+        job.updated_at = time.time()
+        self.persist([job])
+        return True
+
+    async def _worker(self):
+        while True:
+            _, _, job = await self._queue.get()
+            try:
+                if job.state == "queued" and self.governor:
+                    # 等待系统资源允许后再启动
+                    await self.governor.admit(job)
+                if job.state == "paused":
+                    self._held[job.id] = job
+                elif job.state == "queued":
+                    await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    def add_listener(self, listener: Callable[[Job], Awaitable[None]]):
+        """注册任务结束回调（如记录输出戳、执行历史）"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def mark_running(self, job: Job):
+        job.state = "running"
+        job.started_at = job.updated_at = time.time()
+        self.persist([job])
+
+    async def finish(self, job: Job):
+        """任务结束：通知回调、唤醒等待者并保存状态"""
+        job.finished_at = job.updated_at = time.time()
+        for listener in self._listeners:
+            try:
+                await listener(job)
+            except Exception as e:
+                print(f"任务结束回调失败[{job.id}]: {e}")
+        if job.cleanup:
+            try:
+                await asyncio.to_thread(job.cleanup)
+            except OSError as e:
+                print(f"清理任务临时文件失败[{job.id}]: {e}")
+        job.done.set()
+        self.persist([job])
+        self._prune()
+
+    def _prune(self):
+        """已结束的任务超过保留数时，从内存中移除最早结束的（连同其子任务）"""
+        finished = [job for job in self.jobs.values() if job.state in FINAL_STATES]
+        if len(finished) <= self.keep_finished:
+            return
+        # 子任务不单独计数，随所属的编排任务一起移除（编排任务未结束时保留）
+        children = {c.id for job in self.jobs.values() for c in job.children}
+        roots = sorted(
+            (job for job in finished if job.id not in children),
+            key=lambda job: job.finished_at or 0,
+        )
+        stack = roots[: max(len(roots) - self.keep_finished, 0)]
+        while stack:
+            job = stack.pop()
+            self.jobs.pop(job.id, None)
+            stack.extend(job.children)
+
+    async def _run(self, job: Job):
+        self.mark_running(job)
+        loop = asyncio.get_running_loop()
+
+        def on_spawn(pid: int):
+            job.pid = pid
+            if job.cancelled:
+                signal_tree(pid, "kill")
+            # 记录进程号，程序异常退出后下次启动时据此结束遗留的进程（可能在线程中回调）
+            loop.call_soon_threadsafe(self.persist, [job])
+
+        existing = {}
+        try:
+            # 上次运行（如关闭程序时中断）留下的临时输出会让 ffmpeg 拒绝覆盖
+            await asyncio.to_thread(discard_temp_output, job)
+            # 直接写入正式输出的任务，记录运行前的输出状态，取消时据此删除不完整的输出
+            existing = await asyncio.to_thread(_output_stats, job)
+            if job.prepare:
+                await asyncio.to_thread(job.prepare)
+            print(f"开始执行任务[{job.id}]：{job.command}")
+            result = await run_argv(job.argv, job.update_progress, on_spawn)
+            job.exit_code = result.exit_code
+            job.stderr_tail = result.stderr_tail
+            job.state = "done" if job.exit_code == 0 else "failed"
+            if job.state == "failed":
+                job.error = (
+                    "\n".join(result.stderr_tail[-5:]) or f"退出码 {job.exit_code}"
+                )
+        except Exception as e:
+            job.state = "failed"
+            job.error = str(e)
+            print(f"任务执行失败[{job.id}]: {e}")
+        job.pid = None
+        if job.cancelled:
+            job.state = "cancelled"
+            job.error = "任务已取消"
+            await asyncio.to_thread(remove_partial_outputs, job, existing)
+        try:
+            await asyncio.to_thread(commit_output, job)
+        except OSError as e:
+            job.state = "failed"
+            job.error = f"重命名输出文件失败: {e}"
+        await self.finish(job)
+
+
+def temp_output(output: str, job_id: str) -> str:
+    """同目录下的临时输出名，保留扩展名以便 ffmpeg 推断格式"""
+    folder, name = os.path.split(output)
+    stem, ext = os.path.splitext(name)
+    temp = f".{stem}.{job_id[:8]}.part{ext}"
+    return f"{folder}/{temp}" if folder else temp
+
+
+def temp_pairs(job: Job) -> List[Tuple[str, str]]:
+    """先写临时文件的任务的 [(临时输出, 正式输出)]，多输出任务每个输出各有一个"""
+    pairs = []
+    if job.payload.get("temp_output") and job.output:
+        pairs.append((job.payload["temp_output"], job.output))
+    temps = job.payload.get("temp_outputs") or []
+    pairs.extend(zip(temps, job.payload.get("outputs") or []))
+    return pairs
+
+
+def discard_temp_output(job: Job):
+    """删除残留的临时输出"""
+    for temp, _ in temp_pairs(job):
+        if os.path.exists(temp):
+            os.remove(temp)
+
+
+def _output_stats(job: Job) -> Dict[str, Optional[tuple]]:
+    """直接写入正式输出的任务：各输出运行前的 (size, mtime)，不存在为 None"""
+    if temp_pairs(job):
+        return {}
+    stats = {}
+    for output in job.payload.get("outputs") or [job.output]:
+        if output:
+            try:
+                st = os.stat(output)
+                stats[output] = (st.st_size, st.st_mtime_ns)
+            except OSError:
+                stats[output] = None
+    return stats
+
+
+def remove_partial_outputs(job: Job, existing: Dict[str, Optional[tuple]]):
+    """取消时删除本次运行写入的不完整输出，运行前已存在且未被改动的输出保留"""
+    for output, before in existing.items():
+        try:
+            st = os.stat(output)
+        except OSError:
+            continue
+        if before != (st.st_size, st.st_mtime_ns):
+            try:
+                os.remove(output)
+            except OSError as e:
+                print(f"删除不完整的输出失败[{job.id}]: {output}, {e}")
+
+
+def commit_output(job: Job):
+    """先写临时文件的任务：成功时原子替换为正式输出，失败时删除临时文件"""
+    for temp, output in temp_pairs(job):
+        if job.state == "done":
+            os.replace(temp, output)
+        elif os.path.exists(temp):
+            os.remove(temp)
+
+
+def conf_int(value, default: int) -> int:
+    """配置参数转为正整数，无效时使用默认值"""
+    try:
+        return int(value) if value not in (None, "") and int(value) > 0 else default
+    except (TypeError, ValueError):
+        return default
+
+
+scheduler = JobScheduler()
@@ -0,0 +1,128 @@
+import asyncio
+import os
+from functools import partial
+
+from for_ffmpeg.db import AsyncSessionLocal
+from for_ffmpeg.engine import build_argv
+from for_ffmpeg.merge import COPY_CONCAT_TEMPLATE, write_filelist
+from for_ffmpeg.probe import probe_files
+from for_ffmpeg.scheduler import Job, scheduler
+
+# 按关键帧切分（流复制，不重新编码），每段时长由 SEGMENT_TIME 指定
+SPLIT_TEMPLATE = (
+    'ffmpeg -i "IN_PUT" -map 0 -c copy -f segment -segment_time SEGMENT_TIME'
+    ' -reset_timestamps 1 "OUT_PUT"'
+)
+# 每段最短时长（秒），过短的分段得不偿失
+MIN_SEGMENT_SECONDS = 30
+
+
+def submit_segmented(
+    src: str,
+    dst: str,
+    template: str,
+    segments: int,
+    job_id: str | None = None,
+    priority: str = "normal",
+    batch: str | None = None,
+    stamp: dict | None = None,
+) -> Job:
+    """
+    提交分段并行转码：切分 -> 各分段并行转码 -> 无损拼接
+
+    有输出戳参数（增量转换）时，成功后记录输出戳（拼接结果本身是原子替换的）
+    """
+    payload = {"src": src, "dst": dst, "template": template, "segments": segments}
+    if stamp is not None:
+        payload["stamp"] = stamp
+    job = Job(
+        build_argv(template, {"IN_PUT": src, "OUT_PUT": dst}),
+        kind="segment",
+        output=dst,
+        payload=payload,
+        job_id=job_id,
+        priority=priority,
+        batch=batch,
+    )
+    scheduler.track(job)
+    scheduler.mark_running(job)
+    job.task = scheduler.spawn(run_segmented(job, src, dst, template, segments))
+    return job
+
+
+async def run_segmented(job: Job, src: str, dst: str, template: str, segments: int):
+    # 临时目录放在输出目录下，保证拼接结果与输出在同一磁盘
+    await scheduler.orchestrate(
+        job,
+        partial(_split_encode_concat, job, src, dst, template, segments),
+        "分段转码",
+        ".seg-",
+        os.path.dirname(dst) or None,
+    )
+
+
+async def _split_encode_concat(
+    job: Job, src: str, dst: str, template: str, segments: int, workdir: str
+):
+    async with AsyncSessionLocal() as session:
+        info = (await probe_files(session, [src]))[src]
+    if not info.get("duration"):
+        raise RuntimeError(info.get("error") or "无法获取时长")
+    segments = max(1, min(segments, int(info["duration"] // MIN_SEGMENT_SECONDS)))
+    segment_time = info["duration"] / segments
+    in_ext = os.path.splitext(src)[1]
+    out_ext = os.path.splitext(dst)[1]
+
+    job.set_stage("split")
+    split = Job(
+        build_argv(
+            SPLIT_TEMPLATE,
+            {
+                "IN_PUT": src,
+                "SEGMENT_TIME": f"{segment_time:.3f}",
+                "OUT_PUT": f"{workdir}/part_%05d{in_ext}",
+            },
+        ),
+        kind="split",
+        persist=False,
+    )
+    if not await scheduler.run_all(scheduler.adopt(job, [split])):
+        raise RuntimeError("切分失败")
+
+    parts = sorted(p for p in os.listdir(workdir) if p.startswith("part_"))
+    encoded = [f"{workdir}/enc_{i:05d}{out_ext}" for i in range(len(parts))]
+    encodes = [
+        Job(
+            build_argv(template, {"IN_PUT": f"{workdir}/{part}", "OUT_PUT": out}),
+            kind="segment-part",
+            output=out,
+            persist=False,
+        )
+        for part, out in zip(parts, encoded)
+    ]
+    job.set_stage("encode", 0, len(encodes))
+    await scheduler.run_all(
+        scheduler.adopt(job, encodes),
+        lambda done, total: job.set_stage("encode", done, total),
+    )
+    failed = [j.id for j in encodes if j.state != "done"]
+    if failed:
+        raise RuntimeError(f"{len(failed)} 个分段转码失败")
+
+    job.set_stage("concat")
+    # 先拼接到临时目录中，成功后原子重命名为最终输出
+    filelist_path = f"{workdir}/filelist.txt"
+    target = f"{workdir}/output{out_ext}"
+    concat = Job(
+        build_argv(
+            COPY_CONCAT_TEMPLATE,
+            {"FILE_LIST_TEXT": filelist_path, "OUT_PUT": target},
+        ),
+        kind="concat",
+        output=target,
+        prepare=lambda: write_filelist(encoded, filelist_path),
+        persist=False,
+    )
+    if not await scheduler.run_all(scheduler.adopt(job, [concat])):
+        raise RuntimeError(f"拼接失败：{concat.error}")
+    await asyncio.to_thread(os.replace, target, dst)
@@ -0,0 +1,295 @@
+import asyncio
+import os
+import time
+import uuid
+from typing import Dict, List, Optional, Set, Tuple
+
+from for_ffmpeg.batch import (
+    conversion_jobs,
+    make_output_dirs,
+    output_name,
+    output_path,
+)
+from for_ffmpeg.cache import preset_command
+from for_ffmpeg.engine import compile_template
+from for_ffmpeg.file_index import normalize_root
+from for_ffmpeg.incremental import split_up_to_date
+from for_ffmpeg.resources import estimate_outputs
+from for_ffmpeg.scheduler import (
+    JobScheduler,
+    SchedulerFullError,
+    conf_int,
+    scheduler,
+)
+
+# watchdog 为可选依赖，未安装时定时轮询目录
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+# 配置参数：WATCH_FOLDER 监视目录、WATCH_PRESET 预设名称、WATCH_OUTPUT 输出目录、
+# WATCH_PATTERN 输出文件名格式、WATCH_EXTS 扩展名（逗号分隔）、WATCH_RECURSIVE 是否包含子目录、
+# WATCH_SETTLE_SECONDS 文件大小保持不变多久视为写入完成、WATCH_POLL_INTERVAL 检查间隔（秒）
+DEFAULT_WATCH_PATTERN = "{name}"
+DEFAULT_SETTLE_SECONDS = 5
+DEFAULT_POLL_INTERVAL = 2
+
+
+class _EventHandler(FileSystemEventHandler):
+    """把文件系统事件中的路径转交给事件循环"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, notify):
+        super().__init__()
+        self.loop = loop
+        self.notify = notify
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            if path:
+                self.loop.call_soon_threadsafe(self.notify, path)
+
+
+class FolderWatcher:
+    """监视目录，新文件写入完成（大小不再变化）后自动提交转换任务"""
+
+    def __init__(self, scheduler: JobScheduler):
+        self.scheduler = scheduler
+        self.folder: Optional[str] = None
+        self.preset: Optional[str] = None
+        self.template: Optional[str] = None
+        self.output_root: Optional[str] = None
+        self.pattern = DEFAULT_WATCH_PATTERN
+        self.exts: Set[str] = set()
+        self.recursive = True
+        self.settle = DEFAULT_SETTLE_SECONDS
+        self.interval = DEFAULT_POLL_INTERVAL
+        self.error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._observer = None
+        # 目录 -> (mtime, 子目录)，轮询时只重新列举 mtime 变化的目录
+        self._dirs: Dict[str, Tuple[float, List[str]]] = {}
+        # 等待写入完成的文件 -> (size, mtime, 最近一次变化的时间)
+        self._pending: Dict[str, Tuple[int, float, float]] = {}
+        # 已处理的文件 -> (size, mtime)
+        self._known: Dict[str, Tuple[int, float]] = {}
+        # 提交的任务的输出，输出目录位于监视目录内时不再触发转换
+        self._outputs: Set[str] = set()
+        self.submitted = 0
+
+    async def start(self, conf: Dict[str, str]):
+        """按配置参数启动监视，未配置 WATCH_FOLDER 时不启动"""
+        await self.stop()
+        self.error = None
+        if not conf.get("WATCH_FOLDER"):
+            return
+        self.folder = normalize_root(conf["WATCH_FOLDER"])
+        self.preset = conf.get("WATCH_PRESET")
+        output = conf.get("WATCH_OUTPUT")
+        self.output_root = normalize_root(output) if output else self.folder
+        self.pattern = conf.get("WATCH_PATTERN") or DEFAULT_WATCH_PATTERN
+        self.exts = {
+            e.strip().lower().lstrip(".")
+            for e in (conf.get("WATCH_EXTS") or "").split(",")
+            if e.strip()
+        }
+        self.recursive = conf.get("WATCH_RECURSIVE", "1") not in ("0", "false")
+        self.settle = conf_int(conf.get("WATCH_SETTLE_SECONDS"), DEFAULT_SETTLE_SECONDS)
+        self.interval = conf_int(conf.get("WATCH_POLL_INTERVAL"), DEFAULT_POLL_INTERVAL)
+        try:
+            self.template = await self._load_template()
+            if (
+                self.output_root == self.folder
+                and output_name(self.pattern, "sample.ext") == "sample.ext"
+            ):
+                raise ValueError(
+                    "输出目录与监视目录相同时，输出文件名格式不能保持原文件名"
+                    "（会覆盖输入），请配置 WATCH_OUTPUT 或 WATCH_PATTERN"
+                )
+        except Exception as e:
+            self.error = str(e)
+            print(f"目录监视未启动：{e}")
+            return
+        if not os.path.isdir(self.folder):
+            self.error = f"监视目录不存在：{self.folder}"
+            print(self.error)
+            return
+        self._dirs, self._pending, self._known, self._outputs = {}, {}, {}, set()
+        self._task = self.scheduler.spawn(self.run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _load_template(self) -> str:
+        if not self.preset:
+            raise ValueError("未配置预设 WATCH_PRESET")
+        command = preset_command(self.preset)
+        if not command:
+            raise ValueError(f"预设不存在：{self.preset}")
+        compile_template(command)
+        return command
+
+    def status(self) -> dict:
+        return {
+            "folder": self.folder,
+            "preset": self.preset,
+            "output": self.output_root,
+            "running": self._task is not None and not self._task.done(),
+            "mode": "watchdog" if self._observer else "polling",
+            "pending": len(self._pending),
+            "submitted": self.submitted,
+            "error": self.error,
+        }
+
+    def _in_output(self, path: str) -> bool:
+        """位于监视目录内的单独输出目录中（重启后已提交的输出记录会清空，需按目录排除）"""
+        if self.output_root == self.folder:
+            return False
+        return path == self.output_root or path.startswith(
+            self.output_root.rstrip("/") + "/"
+        )
+
+    def _wanted(self, path: str) -> bool:
+        name = os.path.basename(path)
+        # 跳过转换过程中的临时输出与已提交任务的输出
+        if ".part." in name or path in self._outputs or self._in_output(path):
+            return False
+        if self.exts and os.path.splitext(name)[1].lower().lstrip(".") not in self.exts:
+            return False
+        if not self.recursive and os.path.dirname(path) != self.folder:
+            return False
+        return path.startswith(self.folder.rstrip("/") + "/")
+
+    def notify(self, path: str):
+        """文件新增或变化，加入待检查列表"""
+        path = path.replace("\\", "/")
+        if self._wanted(path) and path not in self._pending:
+            self._pending[path] = (-1, 0.0, time.monotonic())
+
+    def _poll(self) -> List[str]:
+        """从根目录开始检查各目录 mtime，只列举发生变化的目录，返回其中的文件"""
+        found = []
+        stack = [self.folder]
+        seen = set()
+        while stack:
+            current = stack.pop()
+            seen.add(current)
+            try:
+                mtime = os.stat(current).st_mtime
+            except OSError:
+                continue
+            cached = self._dirs.get(current)
+            if cached and cached[0] == mtime:
+                subdirs = cached[1]
+            else:
+                subdirs = []
+                try:
+                    with os.scandir(current) as it:
+                        for entry in it:
+                            path = entry.path.replace("\\", "/")
+                            try:
+                                if entry.is_dir(follow_symlinks=False):
+                                    subdirs.append(path)
+                                elif entry.is_file():
+                                    found.append(path)
+                            except OSError:
+                                continue
+                except OSError:
+                    continue
+                self._dirs[current] = (mtime, subdirs)
+            if self.recursive:
+                stack.extend(d for d in subdirs if not self._in_output(d))
+        # 已删除的目录
+        for path in set(self._dirs) - seen:
+            del self._dirs[path]
+        return found
+
+    def _settled(self) -> List[str]:
+        """更新待检查文件的大小，返回大小保持不变超过 settle 秒的文件"""
+        now = time.monotonic()
+        ready = []
+        for path, (size, mtime, since) in list(self._pending.items()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self._pending[path]
+                continue
+            current = (st.st_size, st.st_mtime)
+            if self._known.get(path) == current:
+                del self._pending[path]
+            elif current != (size, mtime):
+                self._pending[path] = (*current, now)
+            elif st.st_size > 0 and now - since >= self.settle:
+                ready.append(path)
+        return ready
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        if Observer is not None:
+            observer = Observer()
+            observer.schedule(
+                _EventHandler(loop, self.notify), self.folder, recursive=self.recursive
+            )
+            observer.start()
+            self._observer = observer
+        print(f"开始监视目录：{self.folder}，方式：{self.status()['mode']}")
+        try:
+            # 启动时检查一次已有文件（已是最新的输出会被跳过），之后只依赖事件或轮询
+            polled = False
+            while True:
+                if self._observer is None or not polled:
+                    for path in await asyncio.to_thread(self._poll):
+                        self.notify(path)
+                    polled = True
+                ready = await asyncio.to_thread(self._settled)
+                if ready:
+                    await self._submit(ready)
+                await asyncio.sleep(self.interval)
+        finally:
+            if self._observer is not None:
+                self._observer.stop()
+                self._observer = None
+
+    async def _submit(self, paths: List[str]):
+        pairs = []
+        for path in paths:
+            ouf = output_path(path, self.folder, self.output_root, self.pattern)
+            if ouf == path:
+                print(f"目录监视跳过：输出将覆盖输入 {path}")
+                self._mark_known(path)
+                continue
+            pairs.append((path, ouf))
+        if not pairs:
+            return
+        await asyncio.to_thread(make_output_dirs, [ouf for _, ouf in pairs])
+        todo, skipped = await split_up_to_date(pairs, self.template)
+        estimates = await estimate_outputs([(i, o) for i, o, _ in todo], self.template)
+        jobs = conversion_jobs(todo, self.template, estimates, batch=uuid.uuid4().hex)
+        try:
+            self.scheduler.submit_many(jobs)
+        except SchedulerFullError as e:
+            # 队列已满时保留在待检查列表中，下次再提交
+            print(f"目录监视提交任务失败：{e}")
+            return
+        for inf, ouf in pairs:
+            self._mark_known(inf)
+            self._outputs.add(ouf)
+        self.submitted += len(jobs)
+        print(
+            f"目录监视提交 {len(jobs)} 个转换任务，跳过 {len(skipped)} 个已是最新的文件"
+        )
+
+    def _mark_known(self, path: str):
+        entry = self._pending.pop(path, None)
+        if entry:
+            self._known[path] = entry[:2]
+
+
+watcher = FolderWatcher(scheduler)